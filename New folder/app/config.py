@@ -6,6 +6,41 @@ class Settings(BaseSettings):
     DB_USER: str = "root"
     DB_PASSWORD: str = "Gopal@143"
     DB_NAME: str = "shopify_insights"
+
+    # On-disk HTTP cache (ETag / Last-Modified revalidation)
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_DIR: str = ".http_cache"
+    HTTP_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    HTTP_CACHE_MAX_STREAMED_BYTES: int = 4 * 1024 * 1024  # streamed products.json pages above this aren't cached
+
+    # Shared HTTP client pool (HTTP/2 needs httpx[http2])
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Per-host token bucket; 429 / Retry-After pause the host
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RATE: float = 5.0
+    RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_MIN_RATE: float = 0.5
+    RATE_LIMIT_DEFAULT_BACKOFF: float = 5.0
+    RATE_LIMIT_MAX_RETRIES: int = 3
+    RATE_LIMIT_MAX_RETRY_AFTER: float = 60.0
+
+    # HTML tree builder: lxml, html.parser or html5lib
+    HTML_PARSER: str = "lxml"
+
+    # /products.json pagination
+    CATALOG_PAGE_SIZE: int = 250
+    CATALOG_PREFETCH_WINDOW: int = 4
+    CATALOG_MAX_PAGES: int = 400
+
+    # Compact catalog storage: descriptions stripped to text at ingest, catalog
+    # columns compressed (msgpack + zstd, or JSON + zlib without them)
+    COMPACT_CATALOG_STORAGE: bool = False
+    COMPACT_ZSTD_LEVEL: int = 3
+    COMPACT_ZLIB_LEVEL: int = 6
     
     class Config:
         env_file = ".env"
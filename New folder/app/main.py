@@ -1,12 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.routers import insights
 from app.config import settings
+from app.services.http_client import open_http_client, close_http_client
 from fastapi.middleware.cors import CORSMiddleware
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_http_client()
+    yield
+    await close_http_client()
+
+def _default_response_class():
+    # orjson encodes the large insights responses much faster than the stdlib
+    try:
+        import orjson # noqa: F401
+        return ORJSONResponse
+    except ImportError:
+        return JSONResponse
+
 app = FastAPI(
     title="Shopify Store Insights Fetcher",
     description="API to fetch insights from Shopify stores without using official API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=_default_response_class()
 )
 
 # CORS middleware
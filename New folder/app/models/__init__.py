@@ -7,7 +7,7 @@ from .schemas import (
     BrandInsightsResponse,
     CompetitorAnalysisResponse
 )
-from .database import Base, ShopifyStoreInsights, get_db
+from .database import Base, ShopifyStoreInsights, get_db, get_async_db
 
 __all__ = [
     "Product",
@@ -19,6 +19,7 @@ __all__ = [
     "CompetitorAnalysisResponse",
     "Base",
     "ShopifyStoreInsights",
-    "get_db"
+    "get_db",
+    "get_async_db"
 ]
 
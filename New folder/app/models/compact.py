@@ -0,0 +1,89 @@
+import json
+import zlib
+from typing import Any, Optional
+from sqlalchemy import LargeBinary, Text
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
+from sqlalchemy.types import TypeDecorator
+from app.config import settings
+
+try:
+    import msgpack
+    import zstandard
+except ImportError: # Optional: falls back to JSON + zlib
+    msgpack = zstandard = None
+
+# Every stored value starts with a one-byte tag naming its encoding, so rows
+# written with any setting (or before msgpack/zstandard were installed) decode.
+# Control bytes can't start the plain text/JSON the columns held before.
+PLAIN_JSON = b"\x01"
+JSON_ZLIB = b"\x02"
+MSGPACK_ZSTD = b"\x03"
+CODECS = (PLAIN_JSON, JSON_ZLIB, MSGPACK_ZSTD)
+
+def compact_codec() -> bytes:
+    """The tag new values are written with."""
+    if not settings.COMPACT_CATALOG_STORAGE:
+        return PLAIN_JSON
+    return MSGPACK_ZSTD if msgpack is not None else JSON_ZLIB
+
+def pack(value: Any, codec: Optional[bytes] = None) -> bytes:
+    codec = codec or compact_codec()
+    if codec == MSGPACK_ZSTD:
+        return codec + zstandard.ZstdCompressor(level=settings.COMPACT_ZSTD_LEVEL).compress(msgpack.packb(value, use_bin_type=True))
+    encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if codec == JSON_ZLIB:
+        return codec + zlib.compress(encoded, settings.COMPACT_ZLIB_LEVEL)
+    return codec + encoded
+
+def unpack(data: bytes) -> Any:
+    codec, payload = data[:1], data[1:]
+    if codec == MSGPACK_ZSTD:
+        if msgpack is None:
+            raise RuntimeError("Stored value is msgpack + zstd encoded; install 'msgpack' and 'zstandard' to read it.")
+        return msgpack.unpackb(zstandard.ZstdDecompressor().decompress(payload), raw=False)
+    if codec == JSON_ZLIB:
+        payload = zlib.decompress(payload)
+    elif codec != PLAIN_JSON:
+        raise ValueError(f"Unknown compact storage tag {codec!r}")
+    return json.loads(payload)
+
+class CompactJSON(TypeDecorator):
+    """
+    JSON-compatible values (text included) stored as tagged, optionally
+    compressed bytes when COMPACT_CATALOG_STORAGE is on. With it off, values are
+    written untagged in the column's `legacy` format ("text" or "json"), so
+    columns that were never converted to LONGBLOB keep working. Reads decode
+    tagged values (even when the driver returns them as text) and take anything
+    untagged to be in the legacy format.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, legacy: str = "json"):
+        super().__init__()
+        self.legacy = legacy
+
+    def load_dialect_impl(self, dialect):
+        if not settings.COMPACT_CATALOG_STORAGE:
+            # Bound as text: accepted by LONGTEXT/JSON columns as well as converted LONGBLOB ones
+            return dialect.type_descriptor(LONGTEXT() if dialect.name == "mysql" else Text())
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not settings.COMPACT_CATALOG_STORAGE:
+            return json.dumps(value, ensure_ascii=False) if self.legacy == "json" else value
+        return pack(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        data = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+        if data[:1] in CODECS:
+            return unpack(data)
+        text = value if isinstance(value, str) else data.decode("utf-8")
+        return json.loads(text) if self.legacy == "json" else text
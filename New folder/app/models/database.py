@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import Column, String, Text, JSON, DateTime
@@ -6,6 +7,7 @@ from datetime import datetime
 import os
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
+from app.models.compact import CompactJSON
 
 load_dotenv()
 
@@ -16,8 +18,11 @@ class ShopifyStoreInsights(Base):
     
     id = Column(String(36), primary_key=True, index=True)
     store_url = Column(String(512), unique=True, nullable=False)
-    product_catalog = Column(JSON)
-    hero_products = Column(JSON)
+    # Whole catalog, compressed when COMPACT_CATALOG_STORAGE is on. With it off, plain JSON is
+    # written, as before. Existing tables need these columns converted before turning it on:
+    #   ALTER TABLE shopify_store_insights MODIFY product_catalog LONGBLOB, MODIFY hero_products LONGBLOB;
+    product_catalog = Column(CompactJSON(legacy="json"))
+    hero_products = Column(CompactJSON(legacy="json"))
     privacy_policy = Column(JSON)
     return_refund_policy = Column(JSON)
     faqs = Column(JSON)
@@ -31,13 +36,22 @@ class ShopifyStoreInsights(Base):
 # URL-encode the password to handle special characters
 db_password = quote_plus(os.getenv('DB_PASSWORD'))
 DATABASE_URL = f"mysql+mysqlconnector://{os.getenv('DB_USER')}:{db_password}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+# Same database through the aiomysql driver, for request handlers
+ASYNC_DATABASE_URL = f"mysql+aiomysql://{os.getenv('DB_USER')}:{db_password}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
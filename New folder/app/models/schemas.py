@@ -12,14 +12,6 @@ class Product(BaseModel):
     url: Optional[Union[HttpUrl, str]] = None
     image_url: Optional[Union[HttpUrl, str]] = None
 
-    def dict(self, **kwargs):
-        data = super().dict(**kwargs)
-        if data.get('url'):
-            data['url'] = str(data['url'])
-        if data.get('image_url'):
-            data['image_url'] = str(data['image_url'])
-        return data
-
 class FAQItem(BaseModel):
     question: str
     answer: str
@@ -33,11 +25,6 @@ class SocialHandle(BaseModel):
     url: Union[HttpUrl, str]
     handle: str
 
-    def dict(self, **kwargs):
-        data = super().dict(**kwargs)
-        data['url'] = str(data['url'])
-        return data
-
 class ContactInfo(BaseModel):
     emails: List[str]
     phone_numbers: List[str]
@@ -55,19 +42,9 @@ class BrandInsightsResponse(BaseModel):
     about_brand: str
     important_links: Dict[str, Union[HttpUrl, str]]
     fetched_at: datetime
-
-    def dict(self, **kwargs):
-        data = super().dict(**kwargs)
-        data['store_url'] = str(data['store_url'])
-        data['important_links'] = {k: str(v) for k, v in data['important_links'].items()}
-        data['fetched_at'] = data['fetched_at'].isoformat()
-        return data
+    network_fetches: Optional[int] = None  # HTTP requests this crawl made (memoized pages count once)
+    catalog_complete: Optional[bool] = None  # False if a products.json page failed and product_catalog is partial
 
 class CompetitorAnalysisResponse(BrandInsightsResponse):
     original_store: Union[HttpUrl, str]
-    competitors: List[BrandInsightsResponse]
-
-    def dict(self, **kwargs):
-        data = super().dict(**kwargs)
-        data['original_store'] = str(data['original_store'])
-        return data
\ No newline at end of file
+    competitors: List[BrandInsightsResponse]
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from datetime import datetime
 from app.services.fetcher import ShopifyFetcher
+from app.utils.exceptions import RateLimitExceededError
 from app.models.schemas import (
     BrandInsightsResponse,
     Policy,
@@ -9,8 +10,8 @@ from app.models.schemas import (
     SocialHandle,
     ContactInfo
 )
-from app.models.database import get_db, ShopifyStoreInsights
-from sqlalchemy.orm import Session
+from app.models.database import get_async_db, ShopifyStoreInsights
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 from sqlalchemy import inspect
 from app.models.database import Base
@@ -20,16 +21,16 @@ router = APIRouter(prefix="/api/v1", tags=["shopify-insights"])
 @router.get("/insights", response_model=BrandInsightsResponse)
 async def get_shopify_insights(
     website_url: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         async with ShopifyFetcher(website_url) as fetcher:
             data = await fetcher.fetch_all_data()
             
-            # Convert all objects to JSON-serializable format
+            # Convert all objects to JSON-serializable format (URLs and datetimes as strings)
             def prepare_for_db(obj):
                 if isinstance(obj, BaseModel):
-                    return obj.dict()
+                    return obj.model_dump(mode="json")
                 elif isinstance(obj, dict):
                     return {k: prepare_for_db(v) for k, v in obj.items()}
                 elif isinstance(obj, (list, tuple)):
@@ -40,13 +41,13 @@ async def get_shopify_insights(
             db_insight = ShopifyStoreInsights(
                 id=str(uuid.uuid4()),
                 store_url=str(website_url),
-                product_catalog=[p.dict() for p in data["products"]],
-                hero_products=[p.dict() for p in data["hero_products"]],
-                privacy_policy=data["policies"].get("privacy", {}).dict(),
-                return_refund_policy=data["policies"].get("refund", {}).dict(),
-                faqs=[f.dict() for f in data["faqs"]],
-                social_handles=[s.dict() for s in data["social_handles"]],
-                contact_info=data["contact_info"].dict(),
+                product_catalog=prepare_for_db(data["products"]),
+                hero_products=prepare_for_db(data["hero_products"]),
+                privacy_policy=prepare_for_db(data["policies"].get("privacy")),
+                return_refund_policy=prepare_for_db(data["policies"].get("refund")),
+                faqs=prepare_for_db(data["faqs"]),
+                social_handles=prepare_for_db(data["social_handles"]),
+                contact_info=prepare_for_db(data["contact_info"]),
                 about_brand=data["about_brand"],
                 important_links={k: str(v) for k, v in data["important_links"].items()},
                 competitors=[],
@@ -54,7 +55,7 @@ async def get_shopify_insights(
             )
             
             db.add(db_insight)
-            db.commit()
+            await db.commit()
             
             return BrandInsightsResponse(
                 store_url=website_url,
@@ -69,9 +70,14 @@ async def get_shopify_insights(
                 contact_info=data["contact_info"],
                 about_brand=data["about_brand"],
                 important_links=data["important_links"],
-                fetched_at=datetime.utcnow()
+                fetched_at=datetime.utcnow(),
+                network_fetches=data["network_fetches"],
+                catalog_complete=data["catalog_complete"]
             )
             
+    except RateLimitExceededError as e:
+        await db.rollback()
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
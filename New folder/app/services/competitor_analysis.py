@@ -1,15 +1,15 @@
 import httpx
 import asyncio
-from typing import List
+from typing import List, Optional
 from bs4 import BeautifulSoup
 import re
-from app.utils.helpers import extract_domain
+from app.utils.helpers import extract_domain, make_soup
 from pydantic import BaseModel
 # or from your schemas import the specific models you need
 class CompetitorAnalyzer:
-    def __init__(self, fetcher):
+    def __init__(self, fetcher, client: Optional[httpx.AsyncClient] = None):
         self.fetcher = fetcher
-        self.client = httpx.AsyncClient()
+        self.client = client or fetcher.client # Reuse the fetcher's pooled client rather than leaking a new one
         
     async def find_competitors(self, max_results: int = 3) -> List[str]:
         """Find competitor websites by searching for similar stores"""
@@ -25,7 +25,7 @@ class CompetitorAnalyzer:
             if response.status_code != 200:
                 return []
                 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
             competitor_links = []
             
             # Extract links from search results
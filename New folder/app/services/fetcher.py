@@ -1,26 +1,129 @@
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urljoin
 import re
 import json
 import asyncio
-from typing import List, Dict, Optional
-from app.utils.exceptions import WebsiteNotFoundError, ShopifyDataError
-from app.utils.helpers import normalize_url, extract_domain
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Iterable, List, Dict, Optional, Tuple
+from app.config import settings
+from app.utils.exceptions import WebsiteNotFoundError, ShopifyDataError, RateLimitExceededError
+from app.utils.helpers import normalize_url, extract_domain, make_soup, html_to_text, first_success
+from app.utils.link_classifier import SOCIAL_CLASSIFIER
+from app.services.http_cache import http_cache, HTTPCache
+from app.services.http_client import build_client, get_http_client
+from app.services.rate_limiter import rate_limiter, HostRateLimiter, retry_after_seconds, is_throttled
 from app.models.schemas import Product, FAQItem, Policy, SocialHandle, ContactInfo
 from pydantic import BaseModel
+
+try:
+    import ijson
+except ImportError: # Optional: products.json pages are then decoded in one piece
+    ijson = None
 # or from your schemas import the specific models you need
+
+# Policy, FAQ and about pages are parsed partially: only the elements their
+# extractors search for are built into the tree.
+POLICY_PAGE_STRAINER = SoupStrainer('div', class_=re.compile(r'policy|content', re.I))
+FAQ_PAGE_STRAINER = SoupStrainer(['div', 'section', 'dl'], class_=re.compile(r'accordion|faq-item|faq-list', re.I))
+ABOUT_PAGE_STRAINER = SoupStrainer('div', class_=re.compile(r'content|about-text', re.I))
+
 class ShopifyFetcher:
-    def __init__(self, website_url: str):
+    def __init__(self, website_url: str, cache: Optional[HTTPCache] = http_cache,
+                 limiter: Optional[HostRateLimiter] = rate_limiter,
+                 client: Optional[httpx.AsyncClient] = None):
         self.base_url = normalize_url(website_url)
         self.domain = extract_domain(self.base_url)
-        self.client = httpx.AsyncClient()
+        # Prefer the app-wide pooled client; only a client built here is closed on exit
+        self.client = client or get_http_client()
+        self._owns_client = self.client is None
+        if self._owns_client:
+            self.client = build_client()
+        self.cache = cache
+        self.limiter = limiter
+        # Per-crawl page memo: one in-flight/finished fetch per URL, parsed trees reused
+        self._pages: Dict[str, asyncio.Future] = {}
+        self._page_waiters: Dict[str, int] = {}
+        self._soups: Dict[Tuple[str, Optional[int]], BeautifulSoup] = {}
+        self.network_fetches = 0
+        self.catalog_complete = False # Set once an empty products.json page marks the end of the catalog
         
     async def __aenter__(self):
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def _request(self, url: str, headers: Optional[Dict], stream: bool) -> httpx.Response:
+        self.network_fetches += 1
+        if stream: # Caller reads the body incrementally and must close the response
+            return await self.client.send(self.client.build_request("GET", url, headers=headers), stream=True)
+        return await self.client.get(url, headers=headers)
+
+    async def _send(self, url: str, headers: Optional[Dict], stream: bool = False) -> httpx.Response:
+        """GET under the per-host rate limit, waiting out 429s / Retry-After a bounded number of times"""
+        if not self.limiter:
+            return await self._request(url, headers, stream)
+
+        host = httpx.URL(url).host
+        for attempt in range(settings.RATE_LIMIT_MAX_RETRIES + 1):
+            await self.limiter.acquire(host)
+            response = await self._request(url, headers, stream)
+            if not is_throttled(response):
+                self.limiter.record_success(host)
+                return response
+            await response.aclose()
+            delay = self.limiter.record_throttled(host, retry_after_seconds(response))
+            if delay > settings.RATE_LIMIT_MAX_RETRY_AFTER:
+                break
+        raise RateLimitExceededError(f"{host} is rate limiting requests; try again later")
+
+    async def _get(self, url: str, params: Optional[Dict] = None) -> httpx.Response:
+        """GET a URL once per crawl; concurrent callers for the same URL share the in-flight fetch"""
+        request_url = str(httpx.URL(url, params=params)) if params else url
+        page = self._pages.get(request_url)
+        if page is None:
+            page = self._pages[request_url] = asyncio.ensure_future(self._fetch(request_url))
+        # Shielded so one cancelled caller doesn't cancel the fetch for the others;
+        # once the last caller gives up, the fetch itself is cancelled and forgotten
+        self._page_waiters[request_url] = self._page_waiters.get(request_url, 0) + 1
+        try:
+            return await asyncio.shield(page)
+        except asyncio.CancelledError:
+            if not page.done() and self._page_waiters[request_url] == 1:
+                page.cancel()
+                self._pages.pop(request_url, None)
+            raise
+        finally:
+            self._page_waiters[request_url] -= 1
+
+    async def _get_soup(self, url: str, parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
+        """Parsed page (None unless 200), reusing a tree already built for the URL in this crawl"""
+        full_key = (url, None)
+        key = (url, id(parse_only)) if parse_only is not None else full_key
+        soup = self._soups.get(key) or self._soups.get(full_key)
+        if soup is not None:
+            return soup
+        response = await self._get(url)
+        if response.status_code != 200:
+            return None
+        soup = self._soups.get(key) or self._soups.get(full_key) # Another caller may have parsed it meanwhile
+        if soup is None:
+            soup = self._soups[key] = make_soup(response.text, parse_only=parse_only)
+        return soup
+
+    async def _fetch(self, request_url: str) -> httpx.Response:
+        """GET a URL, revalidating against the HTTP cache when we hold a copy"""
+        entry = await self.cache.lookup(request_url) if self.cache else None
+        headers = HTTPCache.conditional_headers(entry) if entry else None
+
+        response = await self._send(request_url, headers)
+        if response.status_code == 304 and entry:
+            return await self.cache.not_modified(request_url, entry, response.request)
+        if response.status_code == 200 and self.cache:
+            await self.cache.store(request_url, response)
+        return response
 
 
     async def fetch_important_links(self, soup: BeautifulSoup) -> Dict[str, str]:
@@ -51,7 +154,7 @@ class ShopifyFetcher:
                 self.fetch_faqs()
             )
             
-            return {
+            data = {
             "products": products,
             "hero_products": hero_products,
             "policies": policies,
@@ -61,6 +164,11 @@ class ShopifyFetcher:
             "about_brand": await self.fetch_about_brand(),
             "important_links": await self.fetch_important_links(homepage)  # This was missing
         }
+            data["network_fetches"] = self.network_fetches
+            data["catalog_complete"] = self.catalog_complete
+            return data
+        except RateLimitExceededError:
+            raise
         except Exception as e:
             raise ShopifyDataError(f"Failed to fetch data: {str(e)}")
     
@@ -69,35 +177,109 @@ class ShopifyFetcher:
     async def _fetch_homepage(self) -> BeautifulSoup:
         """Fetch and parse homepage"""
         try:
-            response = await self.client.get(self.base_url)
-            if response.status_code != 200:
+            homepage = await self._get_soup(self.base_url)
+            if homepage is None:
                 raise WebsiteNotFoundError("Website not found or inaccessible")
-            return BeautifulSoup(response.text, 'html.parser')
+            return homepage
         except httpx.RequestError as e:
             raise WebsiteNotFoundError(f"Could not connect to website: {str(e)}")
     
-    async def fetch_products(self) -> List[Product]:
-        """Fetch product catalog from /products.json"""
+    async def _fetch_product_page(self, page: int) -> Optional[List[Product]]:
+        """Fetch and parse one page of /products.json, None if it could not be read"""
         products_url = urljoin(self.base_url, "/products.json")
+        params = {"limit": settings.CATALOG_PAGE_SIZE, "page": page}
+        if ijson is not None:
+            return await self._stream_json_items(products_url, params, 'products', self._parse_product)
         try:
-            response = await self.client.get(products_url)
+            response = await self._get(products_url, params=params)
             if response.status_code == 200:
-                products_data = response.json().get('products', [])
-                return [
-                    Product(
-                        id=str(product.get('id', '')),
-                        title=product.get('title', ''),
-                        description=product.get('body_html', ''),
-                        price=self._extract_price(product),
-                        available=product.get('available', False),
-                        url=urljoin(self.base_url, f"/products/{product.get('handle', '')}"),
-                        image_url=self._extract_image_url(product)
-                    )
-                    for product in products_data
-                ]
-            return []
+                return [self._parse_product(product) for product in response.json().get('products', [])]
+            return None
         except (json.JSONDecodeError, httpx.RequestError):
-            return []
+            return None
+
+    async def _stream_json_items(self, url: str, params: Dict, key: str,
+                                 convert: Callable[[Dict], Any]) -> Optional[List]:
+        """
+        Items of the top-level array `key`, converted as ijson decodes them from
+        the streamed body, so the raw page is never held whole. Not memoized:
+        each catalog page is requested once per crawl anyway.
+        """
+        request_url = str(httpx.URL(url, params=params))
+        entry = await self.cache.lookup(request_url) if self.cache else None
+        headers = HTTPCache.conditional_headers(entry) if entry else None
+        decoder = JSONItemDecoder(key, convert)
+        try:
+            response = await self._send(request_url, headers, stream=True)
+            try:
+                if response.status_code == 304 and entry:
+                    decoder.feed((await self.cache.not_modified(request_url, entry, response.request)).content)
+                    return decoder.close()
+                if response.status_code != 200:
+                    return None
+
+                # Keep a copy for the HTTP cache only while the body stays small
+                body = bytearray() if self.cache else None
+                async for chunk in response.aiter_bytes():
+                    decoder.feed(chunk)
+                    if body is not None:
+                        if len(body) + len(chunk) <= settings.HTTP_CACHE_MAX_STREAMED_BYTES:
+                            body += chunk
+                        else:
+                            body = None
+                results = decoder.close()
+                if body is not None:
+                    await self.cache.store_body(request_url, response.headers, body.decode(response.encoding or "utf-8"))
+                return results
+            finally:
+                await response.aclose()
+        except (ijson.JSONError, httpx.RequestError):
+            return None
+
+    async def iter_product_pages(self) -> AsyncIterator[List[Product]]:
+        """
+        Yield parsed /products.json pages in order, prefetching a window of pages concurrently.
+        Stops at the first empty page; a page that fails stops the walk too, but leaves
+        catalog_complete False so a partial catalog isn't mistaken for the whole one.
+        """
+        pending = deque()
+        next_page = 1
+        try:
+            while True:
+                while len(pending) < settings.CATALOG_PREFETCH_WINDOW and next_page <= settings.CATALOG_MAX_PAGES:
+                    pending.append(asyncio.create_task(self._fetch_product_page(next_page)))
+                    next_page += 1
+                if not pending:
+                    break
+                products = await pending.popleft()
+                if products is None:
+                    print(f"Warning: a products.json page failed for {self.base_url}; catalog is incomplete")
+                    break
+                if not products:
+                    self.catalog_complete = True
+                    break
+                yield products
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _parse_product(self, product: Dict) -> Product:
+        return Product(
+            id=str(product.get('id', '')),
+            title=product.get('title', ''),
+            description=html_to_text(product.get('body_html', '')) if settings.COMPACT_CATALOG_STORAGE else product.get('body_html', ''),
+            price=self._extract_price(product),
+            available=product.get('available', False),
+            url=urljoin(self.base_url, f"/products/{product.get('handle', '')}"),
+            image_url=self._extract_image_url(product)
+        )
+
+    async def fetch_products(self) -> List[Product]:
+        """Fetch the full product catalog from the paginated /products.json"""
+        products = []
+        async for page in self.iter_product_pages():
+            products.extend(page)
+        return products
     
     def _extract_price(self, product: Dict) -> str:
         variants = product.get('variants', [{}])
@@ -138,49 +320,45 @@ class ShopifyFetcher:
         return hero_products
     
     async def fetch_policies(self) -> Dict[str, Policy]:
-        """Fetch privacy and refund policies"""
-        policies = {}
+        """Fetch privacy and refund policies, racing the candidate paths of each"""
         policy_types = ['privacy', 'refund']
-        
-        for policy_type in policy_types:
-            paths = [
-                f"/policies/{policy_type}-policy",
-                f"/pages/{policy_type}-policy",
-                f"/{policy_type}-policy"
-            ]
-            
-            for path in paths:
-                try:
-                    policy_url = urljoin(self.base_url, path)
-                    response = await self.client.get(policy_url)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        content = soup.find('div', class_=re.compile(r'policy|content', re.I))
-                        policies[policy_type] = Policy(
-                            title=f"{policy_type.capitalize()} Policy",
-                            content=content.get_text('\n', strip=True) if content else ''
-                        )
-                        break
-                except httpx.RequestError:
-                    continue
-        
-        return policies
+        results = await asyncio.gather(*(self._fetch_policy(policy_type) for policy_type in policy_types))
+        return {policy_type: policy for policy_type, policy in zip(policy_types, results) if policy}
+
+    async def _fetch_policy(self, policy_type: str) -> Optional[Policy]:
+        paths = [
+            f"/policies/{policy_type}-policy",
+            f"/pages/{policy_type}-policy",
+            f"/{policy_type}-policy"
+        ]
+
+        async def candidate(path: str) -> Optional[Policy]:
+            try:
+                soup = await self._get_soup(urljoin(self.base_url, path), parse_only=POLICY_PAGE_STRAINER)
+            except httpx.RequestError:
+                return None
+            content = soup.find('div', class_=re.compile(r'policy|content', re.I)) if soup is not None else None
+            if not content:
+                return None
+            return Policy(
+                title=f"{policy_type.capitalize()} Policy",
+                content=content.get_text('\n', strip=True)
+            )
+
+        return await first_success([candidate(path) for path in paths])
     
     async def fetch_faqs(self) -> List[FAQItem]:
-        """Fetch and parse FAQs"""
+        """Fetch and parse FAQs, racing the candidate paths"""
         faq_paths = ['/pages/faq', '/pages/frequently-asked-questions', '/faq']
-        
-        for path in faq_paths:
+
+        async def candidate(path: str) -> List[FAQItem]:
             try:
-                faq_url = urljoin(self.base_url, path)
-                response = await self.client.get(faq_url)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    return self._parse_faqs(soup)
+                soup = await self._get_soup(urljoin(self.base_url, path), parse_only=FAQ_PAGE_STRAINER)
             except httpx.RequestError:
-                continue
-                
-        return []
+                return []
+            return self._parse_faqs(soup) if soup is not None else []
+
+        return await first_success([candidate(path) for path in faq_paths]) or []
     
     def _parse_faqs(self, soup: BeautifulSoup) -> List[FAQItem]:
         """Parse FAQ items from HTML"""
@@ -213,39 +391,9 @@ class ShopifyFetcher:
         
         return faqs
     
-    async def fetch_social_handles(self, soup: BeautifulSoup) -> List[SocialHandle]:
-        """Parse social media links"""
-        social_links = []
-        social_elements = soup.find_all('a', href=re.compile(
-            r'facebook|instagram|twitter|x\.com|tiktok|pinterest|youtube', re.I))
-        
-        for element in social_elements:
-            url = element.get('href', '')
-            platform = self._identify_social_platform(url)
-            if platform:
-                social_links.append(SocialHandle(
-                    platform=platform,
-                    url=url,
-                    handle=self._extract_social_handle(url)
-                ))  # Properly closed now
-        
-        return social_links
-    
     def _identify_social_platform(self, url: str) -> Optional[str]:
         """Identify social platform from URL"""
-        platform_patterns = {
-            'facebook': r'facebook\.com',
-            'instagram': r'instagram\.com',
-            'twitter': r'twitter\.com|x\.com',
-            'tiktok': r'tiktok\.com',
-            'pinterest': r'pinterest\.com',
-            'youtube': r'youtube\.com|youtu\.be'
-        }
-        
-        for platform, pattern in platform_patterns.items():
-            if re.search(pattern, url, re.I):
-                return platform
-        return None
+        return SOCIAL_CLASSIFIER.classify(None, url)
     
     def _extract_social_handle(self, url: str) -> str:
         """Extract handle from social URL"""
@@ -272,9 +420,8 @@ class ShopifyFetcher:
         # Scrape contact page if found
         if contact_page_url:
             try:
-                response = await self.client.get(contact_page_url)
-                if response.status_code == 200:
-                    contact_soup = BeautifulSoup(response.text, 'html.parser')
+                contact_soup = await self._get_soup(contact_page_url)
+                if contact_soup is not None:
                     contact_info = self._extract_contact_info(contact_soup)
             except httpx.RequestError:
                 pass
@@ -323,18 +470,15 @@ class ShopifyFetcher:
     async def fetch_social_handles(self, soup: BeautifulSoup) -> List[SocialHandle]:
         """Parse social media links"""
         social_links = []
-        social_elements = soup.find_all('a', href=re.compile(
-            r'facebook|instagram|twitter|x\.com|tiktok|pinterest|youtube', re.I))
-        
-        for element in social_elements:
-            url = element.get('href', '')
+        for element in soup.find_all('a', href=True):
+            url = element['href']
             platform = self._identify_social_platform(url)
             if platform:
                 social_links.append(SocialHandle(
                     platform=platform,
                     url=url,
                     handle=self._extract_social_handle(url)
-                ))  # Properly closed now
+                ))
         
         return social_links
 
@@ -343,7 +487,7 @@ class ShopifyFetcher:
     async def fetch_about_brand(self) -> str:
         """Fetch about brand section"""
         about_page_url = None
-        homepage = await self._fetch_homepage()  # Get the homepage first
+        homepage = await self._fetch_homepage()  # Memoized: reuses the crawl's homepage tree
         about_links = homepage.find_all('a', string=re.compile(r'about us|our story|about', re.I))
         for link in about_links:
             if link.get('href'):
@@ -352,13 +496,35 @@ class ShopifyFetcher:
         
         if about_page_url:
             try:
-                response = await self.client.get(about_page_url)
-                if response.status_code == 200:
-                    about_soup = BeautifulSoup(response.text, 'html.parser')
+                about_soup = await self._get_soup(about_page_url, parse_only=ABOUT_PAGE_STRAINER)
+                if about_soup is not None:
                     content = about_soup.find('div', class_=re.compile(r'content|about-text', re.I))
                     if content:
                         return content.get_text('\n', strip=True)
             except httpx.RequestError:
                 pass
         
-        return ""
\ No newline at end of file
+        return ""
+
+
+class JSONItemDecoder:
+    """Decodes the items of the top-level array `key` from JSON fed in chunks"""
+
+    def __init__(self, key: str, convert: Callable[[Dict], Any]):
+        self.convert = convert
+        self.results: List = []
+        self._decoded = ijson.sendable_list()
+        self._coroutine = ijson.items_coro(self._decoded, f"{key}.item", use_float=True)
+
+    def _drain(self):
+        self.results.extend(self.convert(item) for item in self._decoded)
+        del self._decoded[:]
+
+    def feed(self, chunk: bytes):
+        self._coroutine.send(chunk)
+        self._drain()
+
+    def close(self) -> List:
+        self._coroutine.close()
+        self._drain()
+        return self.results
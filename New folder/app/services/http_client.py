@@ -0,0 +1,41 @@
+from typing import Optional
+import httpx
+from app.config import settings
+
+# Application-lifetime client, opened/closed by the FastAPI lifespan hook so
+# keep-alive connections (and the TLS/DNS work behind them) are reused across requests
+_client: Optional[httpx.AsyncClient] = None
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401 (installed by httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+def build_client() -> httpx.AsyncClient:
+    """Pooled client with the configured connection limits, HTTP/2 when h2 is installed"""
+    return httpx.AsyncClient(
+        http2=settings.HTTP2_ENABLED and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+
+async def open_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    """The shared client, or None outside the app's lifespan"""
+    return _client
@@ -2,12 +2,14 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import re
 from typing import List, Dict, Optional
+from app.utils.helpers import make_soup
+from app.utils.link_classifier import SOCIAL_CLASSIFIER
 from app.models.schemas import Product, FAQItem, Policy, SocialHandle
 from pydantic import BaseModel
 # or from your schemas import the specific models you need
 def parse_shopify_data(html_content: str, base_url: str) -> Dict:
     """Parse Shopify store HTML content"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content)
     
     return {
         'products': parse_products(soup, base_url),
@@ -72,11 +74,8 @@ def parse_policies(soup: BeautifulSoup) -> Dict[str, Policy]:
 def parse_social_handles(soup: BeautifulSoup) -> List[SocialHandle]:
     """Parse social media links from HTML"""
     social_links = []
-    social_elements = soup.find_all('a', href=re.compile(
-        r'facebook|instagram|twitter|x\.com|tiktok|pinterest|youtube', re.I))
-    
-    for element in social_elements:
-        url = element.get('href', '')
+    for element in soup.find_all('a', href=True):
+        url = element['href']
         platform = identify_social_platform(url)
         if platform:
             social_links.append(SocialHandle(
@@ -89,19 +88,7 @@ def parse_social_handles(soup: BeautifulSoup) -> List[SocialHandle]:
 
 def identify_social_platform(url: str) -> Optional[str]:
     """Identify social platform from URL"""
-    platform_patterns = {
-        'facebook': r'facebook\.com',
-        'instagram': r'instagram\.com',
-        'twitter': r'twitter\.com|x\.com',
-        'tiktok': r'tiktok\.com',
-        'pinterest': r'pinterest\.com',
-        'youtube': r'youtube\.com|youtu\.be'
-    }
-    
-    for platform, pattern in platform_patterns.items():
-        if re.search(pattern, url, re.I):
-            return platform
-    return None
+    return SOCIAL_CLASSIFIER.classify(None, url)
 
 def extract_social_handle(url: str) -> str:
     """Extract handle from social URL"""
@@ -8,8 +8,12 @@ from .exceptions import (
 from .helpers import (
     normalize_url,
     extract_domain,
-    is_valid_shopify_url
+    is_valid_shopify_url,
+    make_soup,
+    html_to_text,
+    first_success
 )
+from .link_classifier import LinkClassifier, SOCIAL_CLASSIFIER
 
 __all__ = [
     "WebsiteNotFoundError",
@@ -19,5 +23,10 @@ __all__ = [
     "DataProcessingError",
     "normalize_url",
     "extract_domain",
-    "is_valid_shopify_url"
+    "is_valid_shopify_url",
+    "make_soup",
+    "html_to_text",
+    "first_success",
+    "LinkClassifier",
+    "SOCIAL_CLASSIFIER"
 ]
\ No newline at end of file
@@ -1,5 +1,12 @@
 from urllib.parse import urlparse, urlunparse
+import asyncio
+import importlib.util
 import re
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import Awaitable, Optional, Sequence, TypeVar
+from app.config import settings
+
+T = TypeVar("T")
 
 def normalize_url(url: str) -> str:
     """Normalize URL to ensure consistent format"""
@@ -30,4 +37,30 @@ def is_valid_shopify_url(url: str) -> bool:
     """Check if URL might be a Shopify store"""
     domain = extract_domain(url)
     # Simple check - Shopify stores often have myshopify.com or custom domains
-    return bool(re.search(r'\.myshopify\.com$|\.com$|\.in$|\.io$', domain))
\ No newline at end of file
+    return bool(re.search(r'\.myshopify\.com$|\.com$|\.in$|\.io$', domain))
+
+def make_soup(markup: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parse HTML with the configured tree builder, building only `parse_only` elements if given"""
+    parser = settings.HTML_PARSER
+    if parser != 'html.parser' and importlib.util.find_spec(parser) is None:
+        parser = 'html.parser'
+    return BeautifulSoup(markup, parser, parse_only=parse_only)
+
+def html_to_text(markup: Optional[str]) -> Optional[str]:
+    """Visible text of an HTML fragment such as a product's body_html"""
+    if not markup:
+        return markup
+    return make_soup(markup).get_text(" ", strip=True)
+
+async def first_success(candidates: Sequence[Awaitable[Optional[T]]]) -> Optional[T]:
+    """Run candidates concurrently; return the first truthy result in priority order and cancel the rest"""
+    tasks = [asyncio.ensure_future(candidate) for candidate in candidates]
+    try:
+        for task in tasks:
+            result = await task
+            if result:
+                return result
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
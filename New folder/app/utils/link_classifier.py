@@ -0,0 +1,40 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+SOCIAL_PLATFORMS: Dict[str, List[str]] = {
+    'facebook': ['facebook.com'],
+    'instagram': ['instagram.com'],
+    'twitter': ['twitter.com', 'x.com'],
+    'tiktok': ['tiktok.com'],
+    'pinterest': ['pinterest.com'],
+    'youtube': ['youtube.com', 'youtu.be']
+}
+
+class LinkClassifier:
+    """Classify links by keyword, normalized once at build time; first category in declaration order wins"""
+
+    def __init__(self, categories: Dict[str, List[str]], match_text: bool = True,
+                 url_keyword: Callable[[str], str] = lambda keyword: keyword):
+        self.categories = list(categories)
+        self._rules: List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = [
+            (
+                category,
+                tuple(keyword.lower() for keyword in keywords) if match_text else (),
+                tuple(url_keyword(keyword).lower() for keyword in keywords),
+            )
+            for category, keywords in categories.items()
+        ]
+
+    def classify(self, text: Optional[str], url: Optional[str]) -> Optional[str]:
+        """Return the category of a link from its text and/or URL, None if nothing matches"""
+        text_lower = text.lower() if text else ''
+        url_lower = url.lower() if url else ''
+        for category, text_keywords, url_keywords in self._rules:
+            for keyword in text_keywords:
+                if keyword in text_lower:
+                    return category
+            for keyword in url_keywords:
+                if keyword in url_lower:
+                    return category
+        return None
+
+SOCIAL_CLASSIFIER = LinkClassifier(SOCIAL_PLATFORMS, match_text=False)
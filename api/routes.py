@@ -1,161 +1,309 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from pydantic import HttpUrl, ValidationError
-from sqlalchemy.orm import Session
-import re
-import requests # Ensure this is imported
-
-from services.scraper import WebScraper
-from services.parser import ShopifyParser
-from models.brand_data import BrandContext
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Response, status, Depends
+from fastapi.responses import StreamingResponse
+from pydantic import HttpUrl
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import FrozenSet, Literal, Optional
+from urllib.parse import urlparse
+import asyncio
+import json
+
+from config import settings
+from services import insights
+from services.batch import HostConcurrencyLimiter, batch_result_line
+from services.streaming import STREAM_MEDIA_TYPES, section_event
+from services.jobs import job_workers
+from services.pipeline import parse_fields
+from models.brand_data import BrandContext, BatchInsightsRequest, ScrapeJob, ScrapeJobRequest
 from utils.helpers import normalize_url, is_valid_shopify_url
-from database.dependencies import get_db
+from utils.exceptions import error_status
+from database.dependencies import get_async_db
 from database import crud
-from database.models import create_db_tables
+from database.models import AsyncSessionLocal, create_db_tables
+from services.http_cache import http_cache
+from services.response_cache import response_cache
+from services.rate_limiter import rate_limiter
 
 router = APIRouter()
 
 create_db_tables()
 
 
+async def _stored_insights_body(db: AsyncSession, normalized_url: str, website_url: HttpUrl, background_tasks: BackgroundTasks) -> Optional[bytes]:
+    """Serialized insights for a brand that doesn't need a blocking scrape, or None."""
+    # Hot brands are answered from the in-process cache of serialized responses
+    cached = response_cache.get(normalized_url)
+    if cached:
+        freshness = crud.get_brand_freshness(cached.last_fetched)
+        if freshness != crud.EXPIRED:
+            _schedule_refresh_if_stale(freshness, normalized_url, website_url, background_tasks)
+            return cached.body
+
+    stored = await crud.get_stored_insights_async(db, normalized_url)
+    if stored:
+        freshness = crud.get_brand_freshness(stored.last_fetched)
+        if freshness != crud.EXPIRED:
+            print(f"Insights for {normalized_url} found in DB ({freshness}). Returning cached data.")
+            _schedule_refresh_if_stale(freshness, normalized_url, website_url, background_tasks)
+            body = stored.serialized_insights
+            if body is None: # Saved before serialized insights were stored
+                db_brand = await crud.get_brand_with_children_async(db, normalized_url)
+                body = crud.brand_context_from_db(db_brand).model_dump_json().encode("utf-8")
+            response_cache.put(normalized_url, body, stored.last_fetched)
+            return body
+    return None
+
+
+def _requested_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    try:
+        return parse_fields(fields.split(",") if fields is not None else None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _select_fields(body: bytes, requested: Optional[FrozenSet[str]]) -> bytes:
+    """A stored BrandContext body cut down to website_url and the requested fields."""
+    if requested is None:
+        return body
+    data = json.loads(body)
+    selected = {key: value for key, value in data.items() if key == "website_url" or key in requested}
+    return json.dumps(selected, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _partial_body(brand_context: BrandContext, requested: FrozenSet[str]) -> bytes:
+    return brand_context.model_dump_json(include=requested | {"website_url"}).encode("utf-8")
+
+
+def _http_exception_for(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    status_code, detail = error_status(e)
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+def _schedule_refresh_if_stale(freshness: str, normalized_url: str, website_url: HttpUrl, background_tasks: BackgroundTasks):
+    if freshness == crud.STALE and not insights.is_refreshing(normalized_url):
+        background_tasks.add_task(insights.refresh_brand_insights, normalized_url, website_url)
+
+
 @router.get("/fetch-insights", response_model=BrandContext, summary="Fetch insights from a Shopify store")
-async def fetch_shopify_insights(website_url: HttpUrl, db: Session = Depends(get_db)):
+async def fetch_shopify_insights(website_url: HttpUrl, background_tasks: BackgroundTasks,
+                                 fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     """
     Fetches comprehensive insights from a given Shopify store URL.
-    Attempts to fetch from DB first, if not found, scrapes and saves.
+    Fresh insights are served from the in-process response cache or the DB;
+    stale ones are served the same way while a background re-scrape refreshes
+    them; missing or expired ones are scraped (independent pages concurrently)
+    and saved before responding.
 
     Args:
         website_url (HttpUrl): The URL of the Shopify store (e.g., https://memy.co.in).
-        db (Session): Database session dependency.
+        background_tasks (BackgroundTasks): Used to schedule stale-data refreshes.
+        fields (str): Comma-separated BrandContext fields (e.g. "social_handles,contact_details").
+            Only the pages and extractors those fields need are scraped and only they are
+            returned. A scrape limited this way isn't saved, since the stored insights
+            always hold every field.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         BrandContext: A JSON object containing structured brand data.
     """
     normalized_url = normalize_url(str(website_url))
+    requested = _requested_fields(fields)
 
-    existing_brand_data = crud.get_brand_insights_from_db(db, normalized_url)
-    if existing_brand_data:
-        print(f"Insights for {normalized_url} found in DB. Returning cached data.")
-        return existing_brand_data
+    body = await _stored_insights_body(db, normalized_url, website_url, background_tasks)
+    if body is not None:
+        return Response(content=_select_fields(body, requested), media_type="application/json")
 
     try:
         if not is_valid_shopify_url(normalized_url):
              raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provided URL does not appear to be a Shopify store.")
 
-        scraper = WebScraper(normalized_url)
-        parser = ShopifyParser(normalized_url)
-        
-        brand_context = BrandContext(website_url=website_url)
-
-        products_json = scraper.fetch_json("/products.json")
-        if products_json:
-            brand_context.product_catalog = parser.parse_product_catalog(products_json)
-        else:
-            print(f"Warning: Could not fetch products.json for {normalized_url}. It might not be a standard Shopify store or products are hidden.")
-
-        homepage_soup = scraper.fetch_html("/")
-        if homepage_soup:
-            brand_context.hero_products = parser.parse_hero_products(homepage_soup)
-
-            # --- Privacy Policy ---
-            privacy_policy_url_found = None
-            # Try common paths first
-            for path in ["/policies/privacy-policy", "/pages/privacy-policy"]:
-                url_to_fetch = normalized_url + path
-                temp_soup = scraper.fetch_html(url_to_fetch)
-                if temp_soup:
-                    # Pass the exact URL fetched
-                    brand_context.privacy_policy = parser.parse_policy(temp_soup, "privacy_policy", page_url=url_to_fetch)
-                    privacy_policy_url_found = url_to_fetch
-                    break
-            
-            # Fallback: search for a privacy policy link on the homepage
-            if not brand_context.privacy_policy and homepage_soup:
-                privacy_link = homepage_soup.find('a', href=re.compile(r'privacy-policy|privacy', re.IGNORECASE))
-                if privacy_link and privacy_link.get('href'):
-                    abs_url_from_link = parser._get_absolute_url(privacy_link['href'])
-                    if abs_url_from_link:
-                        temp_soup = scraper.fetch_html(abs_url_from_link)
-                        if temp_soup:
-                            # Pass the exact URL fetched from the link
-                            brand_context.privacy_policy = parser.parse_policy(temp_soup, "privacy_policy", page_url=abs_url_from_link)
-                            privacy_policy_url_found = abs_url_from_link
-
-            # Ensure the policy object has the URL if successfully parsed
-            if brand_context.privacy_policy and not brand_context.privacy_policy.url and privacy_policy_url_found:
-                brand_context.privacy_policy.url = privacy_policy_url_found
-
-
-            # --- Return, Refund Policies ---
-            return_refund_policy_url_found = None
-            for path in ["/policies/refund-policy", "/policies/returns-policy", "/pages/return-policy"]:
-                url_to_fetch = normalized_url + path
-                temp_soup = scraper.fetch_html(url_to_fetch)
-                if temp_soup:
-                    brand_context.return_refund_policy = parser.parse_policy(temp_soup, "return_refund_policy", page_url=url_to_fetch)
-                    return_refund_policy_url_found = url_to_fetch
-                    break
-            
-            if not brand_context.return_refund_policy and homepage_soup:
-                refund_link = homepage_soup.find('a', href=re.compile(r'refund-policy|return-policy|returns', re.IGNORECASE))
-                if refund_link and refund_link.get('href'):
-                    abs_url_from_link = parser._get_absolute_url(refund_link['href'])
-                    if abs_url_from_link:
-                        temp_soup = scraper.fetch_html(abs_url_from_link)
-                        if temp_soup:
-                            brand_context.return_refund_policy = parser.parse_policy(temp_soup, "return_refund_policy", page_url=abs_url_from_link)
-                            return_refund_policy_url_found = abs_url_from_link
-            
-            if brand_context.return_refund_policy and not brand_context.return_refund_policy.url and return_refund_policy_url_found:
-                brand_context.return_refund_policy.url = return_refund_policy_url_found
-
-
-            # --- Brand FAQs ---
-            faq_url_found = None
-            for path in ["/pages/faqs", "/community/faq", "/apps/help-center/faq"]: 
-                url_to_fetch = normalized_url + path
-                temp_soup = scraper.fetch_html(url_to_fetch)
-                if temp_soup:
-                    brand_context.faqs = parser.parse_faqs(temp_soup)
-                    faq_url_found = url_to_fetch
-                    break
-            
-            if not brand_context.faqs and homepage_soup: 
-                faq_link = homepage_soup.find('a', href=re.compile(r'faq|frequently-asked-questions|help', re.IGNORECASE))
-                if faq_link and faq_link.get('href'):
-                    abs_url_from_link = parser._get_absolute_url(faq_link['href'])
-                    if abs_url_from_link:
-                        temp_soup = scraper.fetch_html(abs_url_from_link)
-                        if temp_soup:
-                            brand_context.faqs = parser.parse_faqs(temp_soup)
-                            faq_url_found = abs_url_from_link
-            # Note: FAQs don't have a direct 'url' attribute in your model, so no need to assign it here.
-
-            brand_context.social_handles = parser.parse_social_handles(homepage_soup)
-            brand_context.contact_details = parser.parse_contact_details(homepage_soup)
-            brand_context.brand_text_context = parser.parse_brand_text_context(homepage_soup)
-            brand_context.important_links = parser.parse_important_links(homepage_soup)
-            
-            title_tag = homepage_soup.find('title')
-            if title_tag:
-                brand_name = title_tag.get_text(strip=True)
-                brand_name = re.sub(r'\s*\|\s*Shopify.*$', '', brand_name, flags=re.IGNORECASE)
-                brand_name = re.sub(r'\s*-\s*Powered by Shopify.*$', '', brand_name, flags=re.IGNORECASE)
-                brand_context.brand_name = brand_name.strip()
-
-        if not brand_context.product_catalog and not brand_context.hero_products and not homepage_soup:
-             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Could not access the website or retrieve any meaningful data. It might not be a standard Shopify store or is unreachable.")
-
-        crud.create_brand_insights(db, brand_context)
-        print(f"Insights for {normalized_url} scraped and saved to DB.")
-        
-        return brand_context
-
-    except requests.exceptions.MissingSchema:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid URL format. Please ensure it includes http:// or https://")
-    except requests.exceptions.ConnectionError:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Website not found or unreachable. Please check the URL.")
-    except ValidationError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Data validation error: {e.errors()}")
+        if requested is not None:
+            brand_context = await insights.scrape_brand_insights(normalized_url, website_url, fields=requested)
+            return Response(content=_partial_body(brand_context, requested), media_type="application/json")
+        return await insights.scrape_and_save_brand_insights(db, normalized_url, website_url)
+
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An internal server error occurred: {e}")
\ No newline at end of file
+        raise _http_exception_for(e)
+
+
+@router.get("/fetch-insights/stream", summary="Stream insights from a Shopify store section by section")
+async def stream_shopify_insights(website_url: HttpUrl, background_tasks: BackgroundTasks,
+                                  stream_format: Literal["ndjson", "sse"] = Query("ndjson", alias="format"),
+                                  fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Streaming variant of /fetch-insights: each BrandContext field is sent as soon
+    as it is extracted, so the homepage sections (brand name, social handles,
+    contacts, links) arrive without waiting for the catalog harvest or the
+    policy/FAQ probes. Stored insights are sent the same way, all at once.
+
+    Args:
+        website_url (HttpUrl): The URL of the Shopify store.
+        background_tasks (BackgroundTasks): Used to schedule stale-data refreshes.
+        stream_format (str): "ndjson" for {"section": ..., "data": ...} lines,
+            "sse" for server-sent events named after the section.
+        fields (str): Comma-separated BrandContext fields to scrape and send, as for /fetch-insights.
+        db (AsyncSession): Database session dependency, used for the stored-insights lookup.
+
+    Returns:
+        One event per BrandContext field, then a "done" event with the status
+        ("cached" or "scraped") and status_code, or an "error" event with
+        status_code and detail if the scrape fails part-way.
+    """
+    normalized_url = normalize_url(str(website_url))
+    requested = _requested_fields(fields)
+
+    body = await _stored_insights_body(db, normalized_url, website_url, background_tasks)
+    if body is None and not is_valid_shopify_url(normalized_url):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provided URL does not appear to be a Shopify store.")
+
+    async def events():
+        if body is not None:
+            for section, value in json.loads(_select_fields(body, requested)).items():
+                yield section_event(section, value, stream_format)
+            yield section_event("done", {"status": "cached", "status_code": status.HTTP_200_OK}, stream_format)
+            return
+
+        # The request's session is closed once the handler returns, before the body is streamed
+        async with AsyncSessionLocal() as stream_db:
+            try:
+                sections = insights.stream_and_save_brand_insights(stream_db, normalized_url, website_url) if requested is None \
+                    else insights.stream_brand_insights(normalized_url, website_url, fields=requested)
+                async for section, value in sections:
+                    yield section_event(section, value, stream_format)
+            except Exception as e:
+                error = _http_exception_for(e)
+                yield section_event("error", {"status_code": error.status_code, "detail": error.detail}, stream_format)
+                return
+        yield section_event("done", {"status": "scraped", "status_code": status.HTTP_200_OK}, stream_format)
+
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[stream_format],
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post("/fetch-insights/batch", summary="Fetch insights for many Shopify stores")
+async def fetch_shopify_insights_batch(batch: BatchInsightsRequest, background_tasks: BackgroundTasks,
+                                       stream: bool = False, fields: Optional[str] = None):
+    """
+    Fetches insights for a list of Shopify store URLs.
+    Stored insights are looked up concurrently and answered as soon as they're found;
+    the rest are scraped concurrently, at most BATCH_MAX_CONCURRENCY at a time and
+    BATCH_PER_HOST_CONCURRENCY per host.
+
+    Args:
+        batch (BatchInsightsRequest): The store URLs (duplicates are fetched once).
+        background_tasks (BackgroundTasks): Used to schedule stale-data refreshes.
+        stream (bool): Stream one JSON result per line (NDJSON) as each store completes,
+            instead of a single {"results": [...]} body once all are done.
+        fields (str): Comma-separated BrandContext fields to scrape and return, as for /fetch-insights.
+
+    Returns:
+        Per store: website_url, status ("cached", "scraped" or "error"), status_code,
+        and insights or error.
+    """
+    if len(batch.website_urls) > settings.BATCH_MAX_URLS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"A batch may contain at most {settings.BATCH_MAX_URLS} URLs.")
+
+    requested = _requested_fields(fields)
+    website_urls = {}
+    for website_url in batch.website_urls:
+        website_urls.setdefault(normalize_url(str(website_url)), website_url)
+
+    limiter = HostConcurrencyLimiter(settings.BATCH_MAX_CONCURRENCY, settings.BATCH_PER_HOST_CONCURRENCY)
+    # Lookups don't wait behind scrapes of the same host, but are capped so a
+    # large batch doesn't open a session per URL at once
+    lookup_slots = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+    async def stored_line(normalized_url: str, website_url: HttpUrl) -> Optional[bytes]:
+        async with lookup_slots:
+            # The request's session is closed before a streamed body is sent, and
+            # isn't safe to share between concurrent lookups anyway
+            async with AsyncSessionLocal() as db:
+                body = await _stored_insights_body(db, normalized_url, website_url, background_tasks)
+        if body is None:
+            return None
+        return batch_result_line(normalized_url, "cached", status.HTTP_200_OK, insights=_select_fields(body, requested))
+
+    async def scrape_one(normalized_url: str, website_url: HttpUrl) -> bytes:
+        async with limiter.slot(urlparse(normalized_url).netloc):
+            # Sessions aren't safe to share between concurrent scrapes
+            async with AsyncSessionLocal() as db:
+                try:
+                    if not is_valid_shopify_url(normalized_url):
+                        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provided URL does not appear to be a Shopify store.")
+                    if requested is not None:
+                        brand_context = await insights.scrape_brand_insights(normalized_url, website_url, fields=requested)
+                        return batch_result_line(normalized_url, "scraped", status.HTTP_200_OK,
+                                                 insights=_partial_body(brand_context, requested))
+                    brand_context = await insights.scrape_and_save_brand_insights(db, normalized_url, website_url)
+                    return batch_result_line(normalized_url, "scraped", status.HTTP_200_OK,
+                                             insights=brand_context.model_dump_json().encode("utf-8"))
+                except Exception as e:
+                    error = _http_exception_for(e)
+                    return batch_result_line(normalized_url, "error", error.status_code, error=error.detail)
+
+    async def fetch_one(normalized_url: str, website_url: HttpUrl) -> bytes:
+        try:
+            line = await stored_line(normalized_url, website_url)
+        except Exception as e:
+            error = _http_exception_for(e)
+            return batch_result_line(normalized_url, "error", error.status_code, error=error.detail)
+        return line if line is not None else await scrape_one(normalized_url, website_url)
+
+    async def results():
+        # Each store's line is sent as soon as it's ready, cached or scraped
+        tasks = [asyncio.create_task(fetch_one(normalized_url, website_url)) for normalized_url, website_url in website_urls.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    if stream:
+        async def ndjson():
+            async for line in results():
+                yield line + b"\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    lines = [line async for line in results()]
+    return Response(content=b'{"results":[' + b",".join(lines) + b"]}", media_type="application/json")
+
+
+@router.post("/jobs", response_model=ScrapeJob, status_code=status.HTTP_202_ACCEPTED, summary="Queue a scrape of a Shopify store")
+async def submit_scrape_job(job_request: ScrapeJobRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Queues a scrape and returns immediately with the job id; poll GET /api/jobs/{job_id}.
+    Submitting a URL that already has a queued or running job returns that job.
+    """
+    normalized_url = normalize_url(str(job_request.website_url))
+    if not is_valid_shopify_url(normalized_url):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provided URL does not appear to be a Shopify store.")
+
+    db_job = await crud.get_active_scrape_job_async(db, normalized_url)
+    if not db_job:
+        db_job = await crud.create_scrape_job_async(db, normalized_url, str(job_request.website_url))
+        job_workers.notify()
+    return crud.scrape_job_from_db(db_job)
+
+
+@router.get("/jobs/{job_id}", response_model=ScrapeJob, summary="Status (and result) of a scrape job")
+async def get_scrape_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    db_job = await crud.get_scrape_job_async(db, job_id)
+    if not db_job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+
+    job = crud.scrape_job_from_db(db_job)
+    if db_job.status == crud.JOB_SUCCEEDED:
+        job.insights = await crud.get_brand_insights_from_db_async(db, db_job.normalized_url)
+    return job
+
+
+@router.get("/cache/stats", summary="Cache hit/miss and rate limiter counters")
+async def get_cache_stats():
+    return {
+        "http_cache": http_cache.stats() if http_cache else None,
+        "response_cache": response_cache.stats(),
+        "rate_limiter": rate_limiter.stats() if rate_limiter else None
+    }
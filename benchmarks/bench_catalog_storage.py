@@ -0,0 +1,78 @@
+# shopify_insights_app/benchmarks/bench_catalog_storage.py
+#
+# Bytes stored and encode/decode time for product catalogs under each storage
+# format: per product row (ProductDB.description + variants) and as one
+# whole-catalog value (the sibling app's product_catalog column).
+#
+#   curl -s "https://memy.co.in/products.json?limit=250&page=1" > pages/memy_products_1.json
+#   python benchmarks/bench_catalog_storage.py pages/*_products_*.json --repeat 5
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.compact import PLAIN_JSON, JSON_ZLIB, MSGPACK_ZSTD, msgpack, pack, unpack
+from services.html_parser import html_to_text
+from services.parser import ShopifyParser
+
+CODEC_NAMES = {PLAIN_JSON: "json", JSON_ZLIB: "json+zlib", MSGPACK_ZSTD: "msgpack+zstd"}
+
+def load_catalog(paths):
+    items = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            items.extend(json.load(f).get("products", []))
+    parser = ShopifyParser("https://example.com")
+    return [(product.description, product.variants) for product in parser.iter_product_catalog(items)]
+
+def median_time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def bench_rows(rows, codec, repeat):
+    """One packed description and variants value per product, as ProductDB stores them."""
+    packed = [(pack(description, codec), pack(variants, codec)) for description, variants in rows]
+    size = sum(len(description) + len(variants) for description, variants in packed)
+    encode = median_time(lambda: [(pack(d, codec), pack(v, codec)) for d, v in rows], repeat)
+    decode = median_time(lambda: [(unpack(d), unpack(v)) for d, v in packed], repeat)
+    return size, encode, decode
+
+def bench_blob(rows, codec, repeat):
+    """The whole catalog packed into a single value."""
+    catalog = [{"description": description, "variants": variants} for description, variants in rows]
+    packed = pack(catalog, codec)
+    encode = median_time(lambda: pack(catalog, codec), repeat)
+    decode = median_time(lambda: unpack(packed), repeat)
+    return len(packed), encode, decode
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark catalog storage formats on saved products.json pages")
+    arg_parser.add_argument("pages", nargs="+", help="Saved /products.json responses")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="Runs per format (median is reported)")
+    args = arg_parser.parse_args()
+
+    html_rows = load_catalog(args.pages)
+    text_rows = [(html_to_text(description), variants) for description, variants in html_rows]
+    raw_bytes = sum(len((description or "").encode("utf-8")) + len(json.dumps(variants)) for description, variants in html_rows)
+    print(f"{len(html_rows)} products, {raw_bytes:,} bytes as LONGTEXT HTML + JSON variants")
+
+    codecs = [PLAIN_JSON, JSON_ZLIB] + ([MSGPACK_ZSTD] if msgpack is not None else [])
+    print(f"{'layout':6} {'description':12} {'codec':14} {'bytes':>12} {'ratio':>7} {'encode':>11} {'decode':>11}")
+    for layout, bench in (("rows", bench_rows), ("blob", bench_blob)):
+        for description_kind, rows in (("html", html_rows), ("text", text_rows)):
+            for codec in codecs:
+                size, encode, decode = bench(rows, codec, args.repeat)
+                print(f"{layout:6} {description_kind:12} {CODEC_NAMES[codec]:14} {size:>12,} {raw_bytes / size:>6.1f}x "
+                      f"{encode * 1000:>8.1f} ms {decode * 1000:>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
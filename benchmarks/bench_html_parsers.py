@@ -0,0 +1,42 @@
+# shopify_insights_app/benchmarks/bench_html_parsers.py
+#
+# Per-page parse time for each HTML parser backend on saved Shopify pages.
+#
+#   curl -s https://memy.co.in/ > pages/memy_home.html
+#   python benchmarks/bench_html_parsers.py pages/*.html --repeat 10
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.html_parser import PARSER_BACKENDS, make_soup, resolve_parser_backend
+
+def time_parse(markup: str, backend: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_soup(markup, backend=backend)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on saved pages")
+    arg_parser.add_argument("pages", nargs="+", help="Saved HTML pages to parse")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="Parses per page and backend (median is reported)")
+    args = arg_parser.parse_args()
+
+    backends = [name for name in PARSER_BACKENDS if resolve_parser_backend(name) == name]
+    print(f"{'page':40} {'size':>10} " + " ".join(f"{name:>14}" for name in backends))
+
+    for path in args.pages:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            markup = f.read()
+        timings = [time_parse(markup, backend, args.repeat) for backend in backends]
+        print(f"{os.path.basename(path)[:40]:40} {len(markup):>10} " + " ".join(f"{t * 1000:>11.1f} ms" for t in timings))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# shopify_insights_app/benchmarks/bench_link_classifier.py
+#
+# Compares LinkClassifier with the per-keyword loops it replaced,
+# over footer/nav links taken from saved Shopify pages (or a generated sample).
+#
+#   python benchmarks/bench_link_classifier.py pages/*.html --repeat 20
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.html_parser import make_soup
+from utils.link_classifier import (
+    IMPORTANT_LINK_KEYWORDS, SOCIAL_PLATFORMS, IMPORTANT_LINK_CLASSIFIER, SOCIAL_CLASSIFIER
+)
+
+SAMPLE_TEXTS = [
+    "Track Order", "Order Status", "Contact Us", "Customer Support", "Help Center", "Blog", "News",
+    "Shipping Policy", "Delivery Info", "Careers", "Terms of Service", "Privacy Policy", "Refund Policy",
+    "Shop All", "New Arrivals", "Best Sellers", "Gift Cards", "Sale", "Stockists", "Our Story", "",
+]
+SAMPLE_URLS = [
+    "https://store.example.com/pages/track-order", "https://store.example.com/pages/contact",
+    "https://store.example.com/blogs/news", "https://store.example.com/policies/shipping-policy",
+    "https://store.example.com/policies/privacy-policy", "https://store.example.com/policies/refund-policy",
+    "https://store.example.com/collections/all", "https://store.example.com/collections/new-arrivals",
+    "https://store.example.com/products/classic-tee", "https://www.instagram.com/example",
+    "https://www.facebook.com/example", "https://twitter.com/example", "https://www.youtube.com/@example",
+    "https://www.tiktok.com/@example", "https://www.pinterest.com/example",
+]
+
+def legacy_classify(text: str, url: str):
+    social = None
+    for platform, keywords in SOCIAL_PLATFORMS.items():
+        if any(keyword in url for keyword in keywords):
+            social = platform
+            break
+    for category, keywords in IMPORTANT_LINK_KEYWORDS.items():
+        if any(kw.lower() in text.lower() for kw in keywords) or \
+           any(kw.lower().replace(' ', '-') in url.lower() for kw in keywords):
+            return social, category
+    return social, None
+
+def compiled_classify(text: str, url: str):
+    return SOCIAL_CLASSIFIER.classify(None, url), IMPORTANT_LINK_CLASSIFIER.classify(text, url)
+
+def load_links(pages):
+    links = []
+    for path in pages:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            soup = make_soup(f.read())
+        links.extend((a.get_text(strip=True), a['href']) for a in soup.find_all('a', href=True))
+    return links
+
+def time_classifier(classify, links, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text, url in links:
+            classify(text, url)
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark link classification")
+    arg_parser.add_argument("pages", nargs="*", help="Saved HTML pages to take links from")
+    arg_parser.add_argument("--sample-size", type=int, default=3000, help="Generated links when no pages are given")
+    arg_parser.add_argument("--repeat", type=int, default=10)
+    args = arg_parser.parse_args()
+
+    if args.pages:
+        links = load_links(args.pages)
+    else:
+        rng = random.Random(0)
+        links = [(rng.choice(SAMPLE_TEXTS), rng.choice(SAMPLE_URLS)) for _ in range(args.sample_size)]
+
+    disagreements = sum(1 for text, url in links if legacy_classify(text, url) != compiled_classify(text, url))
+    legacy = time_classifier(legacy_classify, links, args.repeat)
+    compiled = time_classifier(compiled_classify, links, args.repeat)
+
+    print(f"links:        {len(links)}")
+    print(f"legacy loops: {legacy * 1000:8.2f} ms per pass")
+    print(f"classifier:   {compiled * 1000:8.2f} ms per pass ({legacy / compiled:.1f}x)")
+    print(f"disagreements: {disagreements}")
+
+if __name__ == "__main__":
+    main()
@@ -22,8 +22,72 @@ class Settings:
     
     # Construct DATABASE_URL
     DATABASE_URL: str = f"mysql+mysqlconnector://{DB_USER}:{ENCODED_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    # Async driver used by the API handlers and job workers (DATABASE_URL is kept for create_all and scripts)
+    ASYNC_DATABASE_URL: str = f"mysql+aiomysql://{DB_USER}:{ENCODED_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     
+    # Freshness of stored brand insights, by age of BrandDB.last_fetched:
+    # fresh rows are served as-is, stale rows are served while a background
+    # re-scrape runs, and anything older is re-scraped before responding.
+    INSIGHTS_FRESH_TTL: int = int(os.getenv("INSIGHTS_FRESH_TTL", str(24 * 60 * 60)))  # seconds
+    INSIGHTS_STALE_TTL: int = int(os.getenv("INSIGHTS_STALE_TTL", str(7 * 24 * 60 * 60)))  # seconds
+
+    # POST /api/fetch-insights/batch
+    BATCH_MAX_URLS: int = int(os.getenv("BATCH_MAX_URLS", "5000"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))  # stores scraped at once
+    BATCH_PER_HOST_CONCURRENCY: int = int(os.getenv("BATCH_PER_HOST_CONCURRENCY", "2"))
+
+    # Scrape job queue (POST /api/jobs); workers run inside the API process, or
+    # standalone with `python -m services.jobs` (set JOB_WORKERS=0 on the API then)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "2"))  # seconds between idle polls
+    JOB_LEASE_TIMEOUT: int = int(os.getenv("JOB_LEASE_TIMEOUT", "900"))  # seconds without a lease renewal before a running job is reclaimed
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+    # Rows per executemany when bulk-writing scraped children
+    DB_BULK_BATCH_SIZE: int = int(os.getenv("DB_BULK_BATCH_SIZE", "500"))
+
+    # In-process LRU of serialized BrandContext responses
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
     DEFAULT_USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     REQUEST_TIMEOUT: int = 10  # seconds
+    HTML_PARSER: str = os.getenv("HTML_PARSER", "lxml")  # lxml, html.parser or html5lib
+
+    # On-disk HTTP cache (ETag / Last-Modified revalidation)
+    HTTP_CACHE_ENABLED: bool = os.getenv("HTTP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    HTTP_CACHE_DIR: str = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+    HTTP_CACHE_MAX_BYTES: int = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    # Streamed responses (products.json) are only cached up to this size, so a huge page isn't buffered just to cache it
+    HTTP_CACHE_MAX_STREAMED_BYTES: int = int(os.getenv("HTTP_CACHE_MAX_STREAMED_BYTES", str(4 * 1024 * 1024)))
+
+    # Process-wide HTTP client pool
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")  # needs httpx[http2]
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "50"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # seconds an idle connection is kept
+
+    # Per-host request rate limiting (token bucket); 429s and Retry-After pause the host
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    RATE_LIMIT_RATE: float = float(os.getenv("RATE_LIMIT_RATE", "5"))  # requests per second per host
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "10"))
+    RATE_LIMIT_MIN_RATE: float = float(os.getenv("RATE_LIMIT_MIN_RATE", "0.5"))  # floor after repeated 429s
+    RATE_LIMIT_DEFAULT_BACKOFF: float = float(os.getenv("RATE_LIMIT_DEFAULT_BACKOFF", "5"))  # seconds, 429 without Retry-After
+    RATE_LIMIT_MAX_RETRIES: int = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+    RATE_LIMIT_MAX_RETRY_AFTER: float = float(os.getenv("RATE_LIMIT_MAX_RETRY_AFTER", "60"))  # give up rather than wait longer
+
+    # Product catalog harvesting (/products.json pagination)
+    CATALOG_PAGE_SIZE: int = int(os.getenv("CATALOG_PAGE_SIZE", "250"))  # Shopify caps this at 250
+    CATALOG_PREFETCH_WINDOW: int = int(os.getenv("CATALOG_PREFETCH_WINDOW", "4"))  # pages fetched ahead concurrently
+    CATALOG_MAX_PAGES: int = int(os.getenv("CATALOG_MAX_PAGES", "400"))  # safety stop
+    # Skip parsing/writing products whose updated_at hasn't changed since the last crawl
+    CATALOG_DELTA_SYNC: bool = os.getenv("CATALOG_DELTA_SYNC", "true").lower() in ("1", "true", "yes")
+    # Reuse (and don't rewrite) sections whose homepage/policy/FAQ page is unchanged since the last crawl
+    PAGE_FINGERPRINTS: bool = os.getenv("PAGE_FINGERPRINTS", "true").lower() in ("1", "true", "yes")
+    # Compact product storage: descriptions stripped to text at ingest, and
+    # description/variants columns compressed (msgpack + zstd, or JSON + zlib)
+    COMPACT_CATALOG_STORAGE: bool = os.getenv("COMPACT_CATALOG_STORAGE", "false").lower() in ("1", "true", "yes")
+    COMPACT_ZSTD_LEVEL: int = int(os.getenv("COMPACT_ZSTD_LEVEL", "3"))
+    COMPACT_ZLIB_LEVEL: int = int(os.getenv("COMPACT_ZLIB_LEVEL", "6"))
 
 settings = Settings()
\ No newline at end of file
@@ -1,128 +1,283 @@
 # shopify_insights_app/database/crud.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import (
     BrandDB, ProductDB, HeroProductDB, PolicyDB, FAQItemDB,
-    ContactDetailsDB, SocialHandleDB, ImportantLinkDB
+    ContactDetailsDB, SocialHandleDB, ImportantLinkDB, ScrapeJobDB
+)
+from models.brand_data import BrandContext, Product, Policy, FAQItem, ContactDetails, SocialHandle, ImportantLink, ScrapeJob
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import functools
+import uuid
+from config import settings
+from services.response_cache import response_cache
+from utils.helpers import normalize_url
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Loads a brand and everything brand_context_from_db reads in a fixed number of
+# queries: one-to-one children are joined onto the brand row, each collection is
+# fetched with a single SELECT ... WHERE brand_id IN (...).
+BRAND_CHILDREN_LOAD_OPTIONS = (
+    joinedload(BrandDB.privacy_policy),
+    joinedload(BrandDB.return_refund_policy),
+    joinedload(BrandDB.contact_details),
+    selectinload(BrandDB.products),
+    selectinload(BrandDB.hero_products_rel),
+    selectinload(BrandDB.faqs),
+    selectinload(BrandDB.social_handles),
+    selectinload(BrandDB.important_links),
 )
-from models.brand_data import BrandContext, Product, Policy, FAQItem, ContactDetails, SocialHandle, ImportantLink
-from typing import List, Optional
-from datetime import datetime
 
 def get_brand_by_url(db: Session, website_url: str) -> Optional[BrandDB]:
     return db.query(BrandDB).filter(BrandDB.website_url == website_url).first()
 
-def create_brand_insights(db: Session, brand_data: BrandContext) -> BrandDB:
-    # Check if brand already exists
-    db_brand = get_brand_by_url(db, str(brand_data.website_url))
-    if db_brand:
-        # For simplicity, if exists, delete old related data and update.
-        # In a real app, you might merge or version data.
-        db.delete(db_brand)
-        db.commit()
-        db.refresh(db_brand) # Refresh the object for a clean slate
+def get_stored_insights(db: Session, website_url: str):
+    """A brand's (serialized_insights, last_fetched) row, without loading the brand or its children."""
+    return db.execute(
+        select(BrandDB.serialized_insights, BrandDB.last_fetched).where(BrandDB.website_url == website_url)
+    ).first()
 
-    db_brand = BrandDB(
-        website_url=str(brand_data.website_url),
-        brand_name=brand_data.brand_name,
-        brand_text_context=brand_data.brand_text_context,
-        last_fetched=datetime.utcnow()
+def get_brand_with_children(db: Session, website_url: str) -> Optional[BrandDB]:
+    return (
+        db.query(BrandDB)
+        .options(*BRAND_CHILDREN_LOAD_OPTIONS)
+        .filter(BrandDB.website_url == website_url)
+        .execution_options(populate_existing=True) # Don't trust collections loaded before a re-save
+        .first()
     )
-    db.add(db_brand)
-    db.flush() # Flush to get db_brand.id before committing
-
-    # Products
-    for prod in brand_data.product_catalog:
-        db_prod = ProductDB(
-            brand_id=db_brand.id,
-            title=prod.title,
-            price=prod.price,
-            currency=prod.currency,
-            image_url=str(prod.image_url) if prod.image_url else None,
-            product_url=str(prod.product_url) if prod.product_url else None,
-            description=prod.description
-        )
-        db.add(db_prod)
-    
+
+def get_brand_freshness(last_fetched: Optional[datetime], now: Optional[datetime] = None) -> str:
+    if not last_fetched:
+        return EXPIRED
+    age = (now or datetime.utcnow()) - last_fetched
+    if age <= timedelta(seconds=settings.INSIGHTS_FRESH_TTL):
+        return FRESH
+    if age <= timedelta(seconds=settings.INSIGHTS_STALE_TTL):
+        return STALE
+    return EXPIRED
+
+PRODUCT_FIELDS = ("title", "price", "currency", "image_url", "product_url", "description", "shopify_id", "updated_at", "variants")
+
+def _batched(rows: List, size: int) -> Iterator[List]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _bulk_insert(db: Session, model, rows: List[Dict]):
+    # executemany per batch instead of one INSERT per ORM object
+    for batch in _batched(rows, settings.DB_BULK_BATCH_SIZE):
+        db.execute(insert(model), batch)
+
+def _product_row(prod: Product) -> Dict:
+    return {
+        "title": prod.title,
+        "price": prod.price,
+        "currency": prod.currency,
+        "image_url": str(prod.image_url) if prod.image_url else None,
+        "product_url": str(prod.product_url) if prod.product_url else None,
+        "description": prod.description,
+        "shopify_id": prod.shopify_id,
+        "updated_at": prod.updated_at,
+        "variants": prod.variants or None,
+    }
+
+def _product_key(row: Dict) -> Tuple:
+    # Shopify's product id when known, otherwise the best natural key HTML gives us
+    if row["shopify_id"] is not None:
+        return ("id", row["shopify_id"])
+    return ("url", row["product_url"], row["title"])
+
+def _sync_products(db: Session, brand_id: int, products: List[Product], unchanged_shopify_ids: Set[int] = frozenset(),
+                   catalog_complete: bool = True):
+    """
+    Diffs the scraped catalog against stored rows; only new, changed and removed products are written.
+    Rows listed in `unchanged_shopify_ids` were skipped by a delta crawl and are kept as they are.
+    Without `catalog_complete` (the harvest stopped at a failed page), stored rows missing from
+    `products` may still exist in the store, so nothing is deleted.
+    """
+    existing: Dict[Tuple, List[Dict]] = {}
+    stored = db.execute(
+        select(ProductDB.id, *(getattr(ProductDB, field) for field in PRODUCT_FIELDS))
+        .where(ProductDB.brand_id == brand_id)
+    )
+    for stored_row in stored:
+        row = stored_row._asdict()
+        if row["shopify_id"] in unchanged_shopify_ids:
+            continue
+        existing.setdefault(_product_key(row), []).append(row)
+
+    inserts, updates = [], []
+    for prod in products:
+        row = _product_row(prod)
+        matches = existing.get(_product_key(row))
+        if matches:
+            old = matches.pop()
+            if any(old[field] != row[field] for field in PRODUCT_FIELDS):
+                updates.append({"id": old["id"], **row})
+        else:
+            inserts.append({"brand_id": brand_id, **row})
+    removed = [old["id"] for matches in existing.values() for old in matches] if catalog_complete else []
+
+    for batch in _batched(removed, settings.DB_BULK_BATCH_SIZE):
+        db.execute(delete(ProductDB).where(ProductDB.id.in_(batch)), execution_options={"synchronize_session": False})
+    for batch in _batched(updates, settings.DB_BULK_BATCH_SIZE):
+        db.execute(update(ProductDB), batch)
+    _bulk_insert(db, ProductDB, inserts)
+
+def _replace_children(db: Session, brand_id: int, brand_data: BrandContext, unchanged_sections: Set[str] = frozenset()):
+    """
+    Small per-brand collections are cheaper to rewrite than to diff.
+    `unchanged_sections` were reused from the stored insights and are left as they are.
+    """
+    def replace(section: str, model, owner_column, rows: List[Dict]):
+        if section in unchanged_sections:
+            return
+        db.execute(delete(model).where(owner_column == brand_id), execution_options={"synchronize_session": False})
+        _bulk_insert(db, model, rows)
+
     # Hero Products
-    for hero_prod in brand_data.hero_products:
-        db_hero_prod = HeroProductDB(
-            brand_id=db_brand.id,
-            title=hero_prod.title,
-            price=hero_prod.price,
-            currency=hero_prod.currency,
-            image_url=str(hero_prod.image_url) if hero_prod.image_url else None,
-            product_url=str(hero_prod.product_url) if hero_prod.product_url else None
-        )
-        db.add(db_hero_prod)
+    replace("hero_products", HeroProductDB, HeroProductDB.brand_id, [
+        {
+            "brand_id": brand_id,
+            "title": hero_prod.title,
+            "price": hero_prod.price,
+            "currency": hero_prod.currency,
+            "image_url": str(hero_prod.image_url) if hero_prod.image_url else None,
+            "product_url": str(hero_prod.product_url) if hero_prod.product_url else None
+        } for hero_prod in brand_data.hero_products
+    ])
 
     # Policies
-    if brand_data.privacy_policy:
-        db_privacy = PolicyDB(
-            brand_privacy_id=db_brand.id,
-            title=brand_data.privacy_policy.title,
-            content=brand_data.privacy_policy.content,
-            url=str(brand_data.privacy_policy.url) if brand_data.privacy_policy.url else None,
-            policy_type='privacy'
-        )
-        db.add(db_privacy)
-    if brand_data.return_refund_policy:
-        db_return_refund = PolicyDB(
-            brand_return_refund_id=db_brand.id,
-            title=brand_data.return_refund_policy.title,
-            content=brand_data.return_refund_policy.content,
-            url=str(brand_data.return_refund_policy.url) if brand_data.return_refund_policy.url else None,
-            policy_type='return_refund'
-        )
-        db.add(db_return_refund)
+    privacy_policy = brand_data.privacy_policy
+    replace("privacy_policy", PolicyDB, PolicyDB.brand_privacy_id, [{
+        "brand_privacy_id": brand_id,
+        "brand_return_refund_id": None,
+        "title": privacy_policy.title,
+        "content": privacy_policy.content,
+        "url": str(privacy_policy.url) if privacy_policy.url else None,
+        "policy_type": "privacy"
+    }] if privacy_policy else [])
+    return_refund_policy = brand_data.return_refund_policy
+    replace("return_refund_policy", PolicyDB, PolicyDB.brand_return_refund_id, [{
+        "brand_privacy_id": None,
+        "brand_return_refund_id": brand_id,
+        "title": return_refund_policy.title,
+        "content": return_refund_policy.content,
+        "url": str(return_refund_policy.url) if return_refund_policy.url else None,
+        "policy_type": "return_refund"
+    }] if return_refund_policy else [])
 
     # FAQs
-    for faq in brand_data.faqs:
-        db_faq = FAQItemDB(
-            brand_id=db_brand.id,
-            question=faq.question,
-            answer=faq.answer
-        )
-        db.add(db_faq)
+    replace("faqs", FAQItemDB, FAQItemDB.brand_id, [
+        {"brand_id": brand_id, "question": faq.question, "answer": faq.answer} for faq in brand_data.faqs
+    ])
 
     # Contact Details
-    if brand_data.contact_details:
-        db_contact = ContactDetailsDB(
-            brand_id=db_brand.id,
-            emails=",".join(brand_data.contact_details.emails) if brand_data.contact_details.emails else None,
-            phone_numbers=",".join(brand_data.contact_details.phone_numbers) if brand_data.contact_details.phone_numbers else None
-        )
-        db.add(db_contact)
+    contact_details = brand_data.contact_details
+    replace("contact_details", ContactDetailsDB, ContactDetailsDB.brand_id, [{
+        "brand_id": brand_id,
+        "emails": ",".join(contact_details.emails) if contact_details.emails else None,
+        "phone_numbers": ",".join(contact_details.phone_numbers) if contact_details.phone_numbers else None
+    }] if contact_details else [])
 
     # Social Handles
-    for social in brand_data.social_handles:
-        db_social = SocialHandleDB(
-            brand_id=db_brand.id,
-            platform=social.platform,
-            url=str(social.url),
-            username=social.username
-        )
-        db.add(db_social)
+    replace("social_handles", SocialHandleDB, SocialHandleDB.brand_id, [
+        {"brand_id": brand_id, "platform": social.platform, "url": str(social.url), "username": social.username}
+        for social in brand_data.social_handles
+    ])
 
     # Important Links
-    for link in brand_data.important_links:
-        db_link = ImportantLinkDB(
-            brand_id=db_brand.id,
-            text=link.text,
-            url=str(link.url)
+    replace("important_links", ImportantLinkDB, ImportantLinkDB.brand_id, [
+        {"brand_id": brand_id, "text": link.text, "url": str(link.url)} for link in brand_data.important_links
+    ])
+
+def get_product_versions(db: Session, website_url: str) -> Dict[int, Optional[str]]:
+    """shopify_id -> updated_at of the stored catalog, for a delta crawl."""
+    rows = db.execute(
+        select(ProductDB.shopify_id, ProductDB.updated_at)
+        .join(BrandDB, ProductDB.brand_id == BrandDB.id)
+        .where(BrandDB.website_url == website_url, ProductDB.shopify_id.is_not(None))
+    )
+    return {shopify_id: updated_at for shopify_id, updated_at in rows}
+
+def get_page_fingerprints(db: Session, website_url: str):
+    """A brand's (page_fingerprints, serialized_insights) row: the pages its stored sections came from, and those sections."""
+    return db.execute(
+        select(BrandDB.page_fingerprints, BrandDB.serialized_insights).where(BrandDB.website_url == website_url)
+    ).first()
+
+def create_brand_insights(db: Session, brand_data: BrandContext, unchanged_shopify_ids: Set[int] = frozenset(),
+                          unchanged_sections: Set[str] = frozenset(),
+                          page_fingerprints: Optional[Dict[str, Dict[str, str]]] = None,
+                          catalog_complete: bool = True) -> BrandDB:
+    """
+    Inserts or refreshes a brand and its children in a single transaction.
+    An existing brand row is updated in place and its catalog diffed, so a
+    re-scrape only writes products that were added, changed or removed.
+    `unchanged_shopify_ids` are products a delta crawl left out of
+    `brand_data.product_catalog` because they haven't changed, and an
+    incomplete catalog (`catalog_complete` False) removes no products; likewise
+    `unchanged_sections` were reused from unchanged pages and aren't rewritten.
+    The complete insights, and the fingerprints of the pages they were read
+    from, are stored in the same transaction.
+    """
+    db_brand = get_brand_by_url(db, str(brand_data.website_url))
+    if db_brand:
+        db_brand.brand_name = brand_data.brand_name
+        db_brand.brand_text_context = brand_data.brand_text_context
+        db_brand.last_fetched = datetime.utcnow()
+    else:
+        db_brand = BrandDB(
+            website_url=str(brand_data.website_url),
+            brand_name=brand_data.brand_name,
+            brand_text_context=brand_data.brand_text_context,
+            last_fetched=datetime.utcnow()
         )
-        db.add(db_link)
+        db.add(db_brand)
+    db.flush() # Flush to get db_brand.id before writing children
+
+    _sync_products(db, db_brand.id, brand_data.product_catalog, unchanged_shopify_ids, catalog_complete)
+    _replace_children(db, db_brand.id, brand_data, unchanged_sections)
+
+    if unchanged_shopify_ids or not catalog_complete:
+        # The crawl only carried some of the products; serialize the full stored catalog
+        db.flush()
+        full_context = brand_context_from_db(get_brand_with_children(db, db_brand.website_url))
+        full_context.other_insights = brand_data.other_insights
+    else:
+        full_context = brand_data
+    serialized_insights = full_context.model_dump_json().encode("utf-8")
+    db_brand.serialized_insights = serialized_insights
+    if page_fingerprints is not None:
+        db_brand.page_fingerprints = page_fingerprints
 
     db.commit()
     db.refresh(db_brand)
+    # Refreshing unloads the deferred column; keep the bytes we just wrote on the instance
+    set_committed_value(db_brand, "serialized_insights", serialized_insights)
+    response_cache.invalidate(normalize_url(db_brand.website_url))
     return db_brand
 
 def get_brand_insights_from_db(db: Session, website_url: str) -> Optional[BrandContext]:
-    db_brand = db.query(BrandDB).filter(BrandDB.website_url == website_url).first()
+    db_brand = get_brand_with_children(db, website_url)
 
     if not db_brand:
         return None
 
+    return brand_context_from_db(db_brand)
+
+def brand_context_from_db(db_brand: BrandDB) -> BrandContext:
     # Reconstruct Pydantic BrandContext from DB models
     brand_context = BrandContext(
         website_url=db_brand.website_url,
@@ -137,7 +292,10 @@ def get_brand_insights_from_db(db: Session, website_url: str) -> Optional[BrandC
             currency=p.currency,
             image_url=p.image_url,
             product_url=p.product_url,
-            description=p.description
+            description=p.description,
+            shopify_id=p.shopify_id,
+            updated_at=p.updated_at,
+            variants=p.variants or []
         ) for p in db_brand.products
     ]
 
@@ -182,4 +340,131 @@ def get_brand_insights_from_db(db: Session, website_url: str) -> Optional[BrandC
         ImportantLink(text=l.text, url=l.url) for l in db_brand.important_links
     ]
 
-    return brand_context
\ No newline at end of file
+    return brand_context
+
+def create_scrape_job(db: Session, normalized_url: str, website_url: str) -> ScrapeJobDB:
+    db_job = ScrapeJobDB(
+        id=str(uuid.uuid4()),
+        normalized_url=normalized_url,
+        website_url=website_url,
+        status=JOB_QUEUED,
+        attempts=0,
+        created_at=datetime.utcnow()
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_scrape_job(db: Session, job_id: str) -> Optional[ScrapeJobDB]:
+    return db.get(ScrapeJobDB, job_id)
+
+def get_active_scrape_job(db: Session, normalized_url: str) -> Optional[ScrapeJobDB]:
+    """A queued or running job for the URL, so resubmitting doesn't scrape twice."""
+    return (
+        db.query(ScrapeJobDB)
+        .filter(ScrapeJobDB.normalized_url == normalized_url, ScrapeJobDB.status.in_((JOB_QUEUED, JOB_RUNNING)))
+        .order_by(ScrapeJobDB.created_at)
+        .first()
+    )
+
+def claim_scrape_job(db: Session, lease_timeout: int, max_attempts: int) -> Optional[ScrapeJobDB]:
+    """
+    Atomically moves the oldest claimable job to 'running' and returns it.
+    Claimable means queued, or running with an expired lease: its worker died,
+    as it hasn't renewed the lease (renew_scrape_job_lease) for lease_timeout seconds.
+    The claim is a conditional UPDATE, so concurrent workers, in this process or
+    others, never get the same job.
+    """
+    now = datetime.utcnow()
+    # Rows claimed before heartbeats existed only have started_at
+    lease_renewed_at = func.coalesce(ScrapeJobDB.heartbeat_at, ScrapeJobDB.started_at)
+    lease_expired = and_(ScrapeJobDB.status == JOB_RUNNING, lease_renewed_at < now - timedelta(seconds=lease_timeout))
+
+    # Jobs that keep killing their workers are given up on
+    db.execute(
+        update(ScrapeJobDB)
+        .where(lease_expired, ScrapeJobDB.attempts >= max_attempts)
+        .values(status=JOB_FAILED, status_code=500, error="Job abandoned after repeated worker failures.", finished_at=now),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+
+    claimable = or_(ScrapeJobDB.status == JOB_QUEUED, lease_expired)
+    candidate_ids = db.execute(
+        select(ScrapeJobDB.id).where(claimable).order_by(ScrapeJobDB.created_at).limit(8)
+    ).scalars().all()
+    for job_id in candidate_ids:
+        result = db.execute(
+            update(ScrapeJobDB)
+            .where(ScrapeJobDB.id == job_id, claimable)
+            .values(status=JOB_RUNNING, started_at=now, heartbeat_at=now, attempts=ScrapeJobDB.attempts + 1),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.get(ScrapeJobDB, job_id)
+    return None
+
+def _owned_by(job_id: str, attempt: Optional[int]):
+    # A worker owns a job for the attempt it claimed; once reclaimed, its updates no longer apply
+    condition = ScrapeJobDB.id == job_id
+    if attempt is not None:
+        condition = and_(condition, ScrapeJobDB.status == JOB_RUNNING, ScrapeJobDB.attempts == attempt)
+    return condition
+
+def renew_scrape_job_lease(db: Session, job_id: str, attempt: int) -> bool:
+    """Keeps a running job's lease alive; False if the job is no longer this attempt's to run."""
+    result = db.execute(
+        update(ScrapeJobDB).where(_owned_by(job_id, attempt)).values(heartbeat_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def finish_scrape_job(db: Session, job_id: str, job_status: str, status_code: int, error: Optional[str] = None,
+                      attempt: Optional[int] = None):
+    db.execute(
+        update(ScrapeJobDB)
+        .where(_owned_by(job_id, attempt))
+        .values(status=job_status, status_code=status_code, error=error, finished_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+
+def scrape_job_from_db(db_job: ScrapeJobDB) -> ScrapeJob:
+    return ScrapeJob(
+        job_id=db_job.id,
+        website_url=db_job.website_url,
+        status=db_job.status,
+        status_code=db_job.status_code,
+        error=db_job.error,
+        attempts=db_job.attempts,
+        created_at=db_job.created_at,
+        started_at=db_job.started_at,
+        finished_at=db_job.finished_at
+    )
+
+# Async counterparts for AsyncSession callers (the API handlers and job workers).
+# Each runs the sync function above through AsyncSession.run_sync: the ORM code is
+# shared, while the I/O goes through the async driver and yields to the event loop.
+
+def _with_async_session(func: Callable) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(func, *args, **kwargs)
+    wrapper.__name__ = wrapper.__qualname__ = f"{func.__name__}_async"
+    return wrapper
+
+get_stored_insights_async = _with_async_session(get_stored_insights)
+get_brand_with_children_async = _with_async_session(get_brand_with_children)
+get_brand_insights_from_db_async = _with_async_session(get_brand_insights_from_db)
+get_product_versions_async = _with_async_session(get_product_versions)
+get_page_fingerprints_async = _with_async_session(get_page_fingerprints)
+create_brand_insights_async = _with_async_session(create_brand_insights)
+create_scrape_job_async = _with_async_session(create_scrape_job)
+get_scrape_job_async = _with_async_session(get_scrape_job)
+get_active_scrape_job_async = _with_async_session(get_active_scrape_job)
+claim_scrape_job_async = _with_async_session(claim_scrape_job)
+renew_scrape_job_lease_async = _with_async_session(renew_scrape_job_lease)
+finish_scrape_job_async = _with_async_session(finish_scrape_job)
@@ -1,10 +1,14 @@
 # shopify_insights_app/database/dependencies.py
 
-from database.models import SessionLocal
+from database.models import SessionLocal, AsyncSessionLocal
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
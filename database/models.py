@@ -1,11 +1,13 @@
 # shopify_insights_app/database/models.py
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Text, Float, DateTime, ForeignKey, Boolean, JSON
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.dialects.mysql import TEXT, LONGTEXT
+from sqlalchemy.orm import sessionmaker, relationship, deferred
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.dialects.mysql import TEXT, LONGTEXT, LONGBLOB
 from datetime import datetime
 from config import settings
+from database.compact import CompactJSON
 
 # Create a base class for declarative models
 Base = declarative_base()
@@ -15,6 +17,11 @@ DATABASE_URL = settings.DATABASE_URL
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the request path, so DB round trips don't block the event loop.
+# Objects stay loaded after commit: an expired attribute can't lazy-load outside the session.
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 class BrandDB(Base):
     __tablename__ = "brands"
 
@@ -23,6 +30,13 @@ class BrandDB(Base):
     brand_name = Column(String(255), nullable=True)
     brand_text_context = Column(LONGTEXT, nullable=True)
     last_fetched = Column(DateTime, default=datetime.utcnow)
+    # The saved BrandContext as response-ready JSON, written with the rest of the
+    # brand so cache hits skip loading and re-serializing the children. Deferred:
+    # only the read path that serves it selects it.
+    serialized_insights = deferred(Column(LONGBLOB, nullable=True))
+    # {source: {"url", "fingerprint"}} of the pages the stored sections were
+    # extracted from (see services.fingerprints.PageFingerprints)
+    page_fingerprints = deferred(Column(JSON, nullable=True))
 
     # Relationships
     products = relationship("ProductDB", back_populates="brand", cascade="all, delete-orphan")
@@ -58,7 +72,10 @@ class ProductDB(Base):
     currency = Column(String(10), nullable=True)
     image_url = Column(TEXT, nullable=True)
     product_url = Column(TEXT, nullable=True)
-    description = Column(LONGTEXT, nullable=True)
+    description = Column(CompactJSON(legacy="text"), nullable=True)
+    shopify_id = Column(BigInteger, nullable=True, index=True) # Natural key for delta sync
+    updated_at = Column(String(40), nullable=True) # Shopify's updated_at, compared verbatim
+    variants = Column(CompactJSON(legacy="json"), nullable=True)
 
     brand = relationship("BrandDB", back_populates="products")
 
@@ -131,6 +148,21 @@ class ImportantLinkDB(Base):
 
     brand = relationship("BrandDB", back_populates="important_links")
 
+class ScrapeJobDB(Base):
+    __tablename__ = "scrape_jobs"
+
+    id = Column(String(36), primary_key=True) # uuid4
+    normalized_url = Column(String(255), index=True, nullable=False)
+    website_url = Column(String(255), nullable=False) # As submitted
+    status = Column(String(20), index=True, nullable=False) # 'queued', 'running', 'succeeded' or 'failed'
+    status_code = Column(Integer, nullable=True) # HTTP status the scrape would have answered with
+    error = Column(TEXT, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True) # Start of the current attempt
+    heartbeat_at = Column(DateTime, nullable=True) # Renewed by the running worker; the job is reclaimed once it's JOB_LEASE_TIMEOUT old
+    finished_at = Column(DateTime, nullable=True)
+
 # Function to create tables (call this once to set up your database)
 def create_db_tables():
     Base.metadata.create_all(bind=engine)
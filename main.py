@@ -1,13 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import HttpUrl, ValidationError
 from api.routes import router
+from services.jobs import job_workers
+from services.http_client import open_http_client, close_http_client
 from typing import Optional
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_http_client() # Pooled keep-alive client shared by every scrape
+    job_workers.start() # Resumes any jobs left queued by a previous run
+    yield
+    await job_workers.stop()
+    await close_http_client()
+
+def _default_response_class():
+    # orjson encodes the (large) BrandContext payloads several times faster than the stdlib
+    try:
+        import orjson # noqa: F401
+        return ORJSONResponse
+    except ImportError:
+        print("Warning: 'orjson' is not installed. Falling back to the standard JSON encoder.")
+        return JSONResponse
+
 app = FastAPI(
     title="Shopify Insights Fetcher",
     description="API to fetch structured data from Shopify stores without official API.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=_default_response_class()
 )
 
 app.include_router(router, prefix="/api")
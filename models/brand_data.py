@@ -1,5 +1,6 @@
 from pydantic import BaseModel, HttpUrl, EmailStr, Field
 from typing import List, Dict, Optional, Any
+from datetime import datetime
 
 class Product(BaseModel):
     title: str
@@ -8,6 +9,9 @@ class Product(BaseModel):
     image_url: Optional[HttpUrl] = None
     product_url: Optional[HttpUrl] = None
     description: Optional[str] = None
+    shopify_id: Optional[int] = None # Stable product id from /products.json
+    updated_at: Optional[str] = None # Shopify's updated_at, used to skip unchanged products on refresh
+    variants: List[Dict[str, Any]] = Field(default_factory=list)
     # Add more fields as identified from /products.json or HTML scraping
 
 class Policy(BaseModel):
@@ -44,4 +48,22 @@ class BrandContext(BaseModel):
     contact_details: Optional[ContactDetails] = None
     brand_text_context: Optional[str] = None # About us, brand story, etc.
     important_links: List[ImportantLink] = Field(default_factory=list)
-    other_insights: Dict[str, Any] = Field(default_factory=dict) # For any additional data
\ No newline at end of file
+    other_insights: Dict[str, Any] = Field(default_factory=dict) # For any additional data
+
+class BatchInsightsRequest(BaseModel):
+    website_urls: List[HttpUrl] = Field(..., min_length=1)
+
+class ScrapeJobRequest(BaseModel):
+    website_url: HttpUrl
+
+class ScrapeJob(BaseModel):
+    job_id: str
+    website_url: str
+    status: str # 'queued', 'running', 'succeeded' or 'failed'
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    insights: Optional[BrandContext] = None # Set once the job has succeeded
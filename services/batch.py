@@ -0,0 +1,35 @@
+# shopify_insights_app/services/batch.py
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+class HostConcurrencyLimiter:
+    """
+    Caps concurrent scrapes overall and per host. The host slot is taken first,
+    so a task queued behind a busy host doesn't hold one of the global slots.
+    """
+
+    def __init__(self, max_concurrency: int, per_host_concurrency: int):
+        self._global = asyncio.Semaphore(max(1, max_concurrency))
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        host_semaphore = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+        async with host_semaphore:
+            async with self._global:
+                yield
+
+def batch_result_line(website_url: str, result_status: str, status_code: int,
+                      insights: Optional[bytes] = None, error: Optional[str] = None) -> bytes:
+    """
+    One batch result as a JSON object. `insights` is an already-serialized
+    BrandContext and is spliced in as-is rather than decoded and re-encoded.
+    """
+    head = json.dumps({"website_url": website_url, "status": result_status, "status_code": status_code})[:-1]
+    if insights is not None:
+        return f'{head}, "insights": '.encode("utf-8") + insights + b"}"
+    return f'{head}, "error": {json.dumps(error)}}}'.encode("utf-8")
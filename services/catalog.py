@@ -0,0 +1,125 @@
+# shopify_insights_app/services/catalog.py
+
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from services.scraper import WebScraper
+from config import settings
+
+class CatalogHarvester:
+    """
+    Walks /products.json?limit=N&page=P until the first empty page.
+
+    A page that can't be fetched is not an empty page: the walk stops there and
+    the harvest is left incomplete (as it is when max_pages runs out first), so
+    callers know products missing from it may still exist.
+
+    Up to `prefetch_window` pages are in flight at once, and pages are yielded
+    in order as soon as they arrive, so only the window is ever held in memory.
+    With `convert`, each product is converted (e.g. parsed into a Product, or
+    dropped by returning None) as it is decoded from the response stream, so a
+    page is held as converted items rather than as its raw JSON.
+    """
+
+    def __init__(self, scraper: WebScraper,
+                 page_size: int = settings.CATALOG_PAGE_SIZE,
+                 prefetch_window: int = settings.CATALOG_PREFETCH_WINDOW,
+                 max_pages: int = settings.CATALOG_MAX_PAGES,
+                 convert: Optional[Callable[[Dict], Any]] = None):
+        self.scraper = scraper
+        self.convert = convert
+        self.page_size = page_size
+        self.prefetch_window = max(1, prefetch_window)
+        self.max_pages = max_pages
+        self.pages_fetched = 0
+        self.reachable = False # True once the first page has been served as JSON
+        self.complete = False # True once an empty page marked the end of the catalog
+
+    async def _fetch_page(self, page: int) -> Optional[Tuple[int, List]]:
+        """(products on the page, converted products) or None if the page couldn't be fetched."""
+        decoded = 0
+
+        def convert(item: Dict):
+            nonlocal decoded
+            decoded += 1
+            return self.convert(item) if self.convert else item
+
+        products = await self.scraper.fetch_json_items("/products.json", "products",
+                                                       params={"limit": self.page_size, "page": page}, convert=convert)
+        if products is None:
+            return None
+        return decoded, products
+
+    async def iter_pages(self) -> AsyncIterator[List[Dict]]:
+        pending = deque()
+        next_page = 1
+        try:
+            while True:
+                while len(pending) < self.prefetch_window and next_page <= self.max_pages:
+                    pending.append(asyncio.create_task(self._fetch_page(next_page)))
+                    next_page += 1
+                if not pending:
+                    break
+
+                page = await pending.popleft()
+                self.pages_fetched += 1
+                if page is None:
+                    print(f"Warning: products.json page {self.pages_fetched} failed; catalog harvest is incomplete.")
+                    break
+                if not page[0]:
+                    self.complete = True
+                    break
+                self.reachable = True
+                yield page[1]
+        finally:
+            # Pages prefetched past the end of the catalog are no longer needed
+            for task in pending:
+                task.cancel()
+
+    async def iter_products(self) -> AsyncIterator[Any]:
+        async for page in self.iter_pages():
+            for item in page:
+                yield item
+
+
+class CatalogDelta:
+    """
+    Compares harvested products.json items with the (shopify_id -> updated_at)
+    versions already stored, so only new or updated items need parsing and writing.
+    """
+
+    def __init__(self, known_versions: Dict[int, Optional[str]]):
+        self.known_versions = known_versions
+        self.seen_ids: Set[int] = set()
+        self.unchanged_ids: Set[int] = set()
+        # Sets rather than counters: an item seen again (e.g. a page re-read) counts once
+        self.added_ids: Set[int] = set()
+        self.changed_ids: Set[int] = set()
+
+    def needs_update(self, item: Dict) -> bool:
+        shopify_id = item.get('id')
+        if shopify_id is None:
+            return True
+        self.seen_ids.add(shopify_id)
+        if shopify_id not in self.known_versions:
+            self.added_ids.add(shopify_id)
+            return True
+        if self.known_versions[shopify_id] != item.get('updated_at'):
+            self.changed_ids.add(shopify_id)
+            return True
+        self.unchanged_ids.add(shopify_id)
+        return False
+
+    @property
+    def removed(self) -> int:
+        return len(self.known_versions.keys() - self.seen_ids)
+
+    def summary(self, complete: bool = True) -> Dict[str, Any]:
+        """Sync counts; after an incomplete harvest, unseen products aren't known to be removed."""
+        summary = {"added": len(self.added_ids), "changed": len(self.changed_ids)}
+        if complete:
+            summary["removed"] = self.removed
+        summary["unchanged"] = len(self.unchanged_ids)
+        if not complete:
+            summary["complete"] = False
+        return summary
@@ -0,0 +1,54 @@
+# shopify_insights_app/services/fingerprints.py
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Optional, Set
+from config import settings
+from models.brand_data import BrandContext
+from services.html_parser import resolve_parser_backend
+from services.parser import EXTRACTOR_VERSION
+
+# Per-request CSP nonces change on every response without changing anything the
+# extractors read; indentation and line endings get reformatted by theme deploys.
+_NONCE_ATTRIBUTE = re.compile(r'\snonce="[^"]*"')
+_LINE_BREAK = re.compile(r'[ \t\r\f\v]*\n\s*')
+
+def page_fingerprint(markup: str) -> str:
+    """
+    SHA-256 of a page's normalized markup, salted with what shapes the sections
+    extracted from it: the extractors' version and the parser backend.
+    """
+    normalized = _LINE_BREAK.sub("\n", _NONCE_ATTRIBUTE.sub("", markup.replace("\r\n", "\n"))).strip()
+    salt = f"extractors-v{EXTRACTOR_VERSION}:{resolve_parser_backend(settings.HTML_PARSER)}"
+    return hashlib.sha256(f"{salt}\n{normalized}".encode("utf-8")).hexdigest()
+
+class PageFingerprints:
+    """
+    Fingerprints of the pages a brand's sections were extracted from, keyed by
+    source ("homepage" or the policy/FAQ section): {"url": ..., "fingerprint": ...}.
+    When a source's page comes back from the same URL with the same fingerprint,
+    its sections are taken from the previously stored insights instead of being
+    parsed, and left out of the DB write (see unchanged_sections).
+    """
+
+    def __init__(self, known: Optional[Dict[str, Dict[str, str]]] = None, previous: Optional[BrandContext] = None):
+        self.known = known or {}
+        self.previous = previous
+        self.sources: Dict[str, Dict[str, str]] = {} # This crawl's fingerprints, stored with the brand
+        self.unchanged_sections: Set[str] = set()
+        self._pages: Dict[str, str] = {} # url -> fingerprint of every page read this crawl
+
+    def unchanged(self, source: str, url: str, markup: str) -> bool:
+        """Fingerprints the page; True if `source`'s sections were extracted from exactly this page last time."""
+        self._pages[url] = page_fingerprint(markup)
+        return self.previous is not None and self.known.get(source) == {"url": url, "fingerprint": self._pages[url]}
+
+    def previous_value(self, section: str) -> Any:
+        return getattr(self.previous, section)
+
+    def record(self, source: str, url: str, sections: Iterable[str]):
+        """`sections` were taken from `url` this crawl; an unchanged page's sections need no DB write."""
+        page = {"url": url, "fingerprint": self._pages[url]}
+        if self.previous is not None and self.known.get(source) == page:
+            self.unchanged_sections.update(sections)
+        self.sources[source] = page
@@ -0,0 +1,36 @@
+# shopify_insights_app/services/html_parser.py
+
+import importlib.util
+from functools import lru_cache
+from typing import Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from config import settings
+
+# Beautiful Soup tree builders, fastest first, and the module each one needs
+PARSER_BACKENDS = {
+    'lxml': 'lxml',
+    'html.parser': None, # stdlib, always available
+    'html5lib': 'html5lib',
+}
+
+@lru_cache(maxsize=None)
+def resolve_parser_backend(name: str) -> str:
+    """Returns `name` if its tree builder is installed, otherwise falls back to html.parser."""
+    if name not in PARSER_BACKENDS:
+        print(f"Unknown HTML parser backend '{name}', falling back to html.parser")
+        return 'html.parser'
+    module = PARSER_BACKENDS[name]
+    if module and importlib.util.find_spec(module) is None:
+        print(f"HTML parser backend '{name}' is not installed, falling back to html.parser")
+        return 'html.parser'
+    return name
+
+def make_soup(markup: str, backend: Optional[str] = None, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parses `markup`; with `parse_only`, only the matching elements (and their subtrees) are built."""
+    return BeautifulSoup(markup, resolve_parser_backend(backend or settings.HTML_PARSER), parse_only=parse_only)
+
+def html_to_text(markup: Optional[str]) -> Optional[str]:
+    """Visible text of an HTML fragment (e.g. a product's body_html), whitespace-collapsed."""
+    if not markup:
+        return markup
+    return make_soup(markup).get_text(" ", strip=True)
@@ -0,0 +1,176 @@
+# shopify_insights_app/services/http_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+import httpx
+from config import settings
+
+class HTTPCache:
+    """
+    On-disk cache of response bodies and their validators (ETag / Last-Modified).
+
+    A cached URL is revalidated with If-None-Match / If-Modified-Since; a 304 is
+    answered from disk. Entries are evicted least-recently-used once the total
+    size of the cache directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict() # key -> size on disk, oldest first
+        self.hits = 0          # revalidated with a 304 and served from disk
+        self.misses = 0        # full download (no entry, or the entry was stale)
+        self.stores = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        existing = []
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                existing.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(existing):
+            self._entries[key] = size
+            self.total_bytes += size
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    # Disk reads, writes and JSON (de)coding run in worker threads, so a large
+    # entry doesn't stall the event loop; the LRU index is only changed on the loop.
+
+    async def lookup(self, url: str) -> Optional[Dict]:
+        key = self._key(url)
+        if key not in self._entries:
+            return None
+        try:
+            return await asyncio.to_thread(self._read, self._path(key))
+        except (OSError, ValueError):
+            await self._remove(key)
+            return None
+
+    @staticmethod
+    def _read(path: str) -> Dict:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def conditional_headers(entry: Dict) -> Dict[str, str]:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    async def not_modified(self, url: str, entry: Dict, request: httpx.Request) -> httpx.Response:
+        """Marks a 304 revalidation as a hit and rebuilds the cached response."""
+        self.hits += 1
+        key = self._key(url)
+        # Another scrape may have evicted the entry while the request was in flight;
+        # the caller's copy is still good, there's just no LRU position to refresh
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            await asyncio.to_thread(self._touch, self._path(key))
+        return httpx.Response(
+            200,
+            content=entry["body"].encode("utf-8"),
+            headers={"Content-Type": entry.get("content_type") or "text/plain; charset=utf-8"},
+            request=request
+        )
+
+    async def store(self, url: str, response: httpx.Response):
+        await self.store_body(url, response.headers, response.text)
+
+    async def store_body(self, url: str, headers: httpx.Headers, body: str):
+        """Stores a body read by the caller (e.g. while streaming) under the response's validators."""
+        self.misses += 1
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return # Nothing to revalidate with, so no point keeping the body
+
+        content_type = headers.get("Content-Type", "text/plain")
+        if "charset" not in content_type:
+            content_type += "; charset=utf-8"
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_type": content_type,
+            "body": body,
+        }
+        key = self._key(url)
+        try:
+            size = await asyncio.to_thread(self._write, self._path(key), entry, self.max_bytes)
+        except OSError as e:
+            print(f"Warning: could not write HTTP cache entry for {url}: {e}.")
+            return
+        if size is None:
+            return
+
+        self.total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+        self.stores += 1
+
+        evicted = []
+        while self.total_bytes > self.max_bytes and self._entries:
+            oldest, oldest_size = self._entries.popitem(last=False)
+            self.total_bytes -= oldest_size
+            evicted.append(self._path(oldest))
+            self.evictions += 1
+        if evicted:
+            await asyncio.to_thread(self._delete, evicted)
+
+    @staticmethod
+    def _write(path: str, entry: Dict, max_bytes: int) -> Optional[int]:
+        """Writes the entry atomically and returns its size, or None if it's too large to keep."""
+        data = json.dumps(entry).encode("utf-8")
+        if len(data) > max_bytes:
+            return None
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp" # Concurrent stores of one URL mustn't share a temp file
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _delete(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def _remove(self, key: str):
+        self.total_bytes -= self._entries.pop(key, 0)
+        await asyncio.to_thread(self._delete, [self._path(key)])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+http_cache = HTTPCache(settings.HTTP_CACHE_DIR, settings.HTTP_CACHE_MAX_BYTES) if settings.HTTP_CACHE_ENABLED else None
@@ -0,0 +1,50 @@
+# shopify_insights_app/services/http_client.py
+
+from typing import Optional
+import httpx
+from config import settings
+
+# One AsyncClient for the life of the process, opened/closed by the FastAPI
+# lifespan hook (and by the standalone job workers). Sharing it means keep-alive
+# connections - and with them the TLS sessions and DNS lookups that set them up -
+# are reused across scrapes instead of being rebuilt for every request.
+_client: Optional[httpx.AsyncClient] = None
+
+def _http2_available() -> bool:
+    try:
+        import h2 # noqa: F401 (installed by httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+def build_client() -> httpx.AsyncClient:
+    http2 = settings.HTTP2_ENABLED and _http2_available()
+    if settings.HTTP2_ENABLED and not http2:
+        print("Warning: HTTP/2 requested but the 'h2' package is not installed. Falling back to HTTP/1.1.")
+    return httpx.AsyncClient(
+        headers={'User-Agent': settings.DEFAULT_USER_AGENT},
+        timeout=settings.REQUEST_TIMEOUT,
+        follow_redirects=True,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+
+async def open_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    """The shared client, or None outside the app's lifespan (scripts, benchmarks)."""
+    return _client
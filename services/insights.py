@@ -0,0 +1,111 @@
+# shopify_insights_app/services/insights.py
+
+from typing import Any, AsyncIterator, FrozenSet, Optional, Tuple
+from pydantic import HttpUrl
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import crud
+from database.models import AsyncSessionLocal
+from models.brand_data import BrandContext
+from services.fingerprints import PageFingerprints
+from services.pipeline import InsightsPipeline
+from services.response_cache import response_cache
+from utils.exceptions import WebsiteNotFoundError
+
+# Normalized URLs with a background refresh in progress, so a burst of requests
+# for a stale brand triggers a single re-scrape.
+_refreshing = set()
+
+def _ensure_found(pipeline: InsightsPipeline, brand_context: BrandContext):
+    if not pipeline.catalog_fetched and not brand_context.hero_products and not pipeline.homepage_fetched \
+            and not pipeline.sections_found:
+        raise WebsiteNotFoundError("Could not access the website or retrieve any meaningful data. It might not be a standard Shopify store or is unreachable.")
+
+async def _run_pipeline(pipeline: InsightsPipeline) -> BrandContext:
+    brand_context = await pipeline.run()
+    _ensure_found(pipeline, brand_context)
+    return brand_context
+
+async def scrape_brand_insights(normalized_url: str, website_url: HttpUrl,
+                                fields: Optional[FrozenSet[str]] = None) -> BrandContext:
+    """Scrapes without saving; with `fields`, only those BrandContext fields are filled in."""
+    return await _run_pipeline(InsightsPipeline(normalized_url, website_url, fields=fields))
+
+async def stream_brand_insights(normalized_url: str, website_url: HttpUrl,
+                                fields: Optional[FrozenSet[str]] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """scrape_brand_insights, yielding (BrandContext field, value) as each section is extracted."""
+    pipeline = InsightsPipeline(normalized_url, website_url, fields=fields)
+    async for section, value in pipeline.stream():
+        yield section, value
+    _ensure_found(pipeline, pipeline.brand_context)
+
+async def _pipeline_for(db: AsyncSession, normalized_url: str, website_url: HttpUrl) -> InsightsPipeline:
+    known_versions = await crud.get_product_versions_async(db, str(website_url)) if settings.CATALOG_DELTA_SYNC else None
+    page_fingerprints = None
+    if settings.PAGE_FINGERPRINTS:
+        stored = await crud.get_page_fingerprints_async(db, str(website_url))
+        if stored and stored.page_fingerprints and stored.serialized_insights:
+            page_fingerprints = PageFingerprints(stored.page_fingerprints, BrandContext.model_validate_json(stored.serialized_insights))
+        else:
+            page_fingerprints = PageFingerprints() # Nothing to reuse yet; fingerprint this crawl's pages for the next
+    return InsightsPipeline(normalized_url, website_url, known_product_versions=known_versions,
+                            page_fingerprints=page_fingerprints)
+
+async def _save_pipeline_result(db: AsyncSession, normalized_url: str, pipeline: InsightsPipeline, brand_context: BrandContext) -> BrandContext:
+    unchanged_ids = pipeline.catalog_delta.unchanged_ids if pipeline.catalog_delta else frozenset()
+    # A partial harvest (a page failed) only updates products; the rest stay as stored
+    partial_catalog = bool(unchanged_ids) or not pipeline.catalog_complete
+    fingerprints = pipeline.page_fingerprints
+    db_brand = await crud.create_brand_insights_async(
+        db, brand_context, unchanged_shopify_ids=unchanged_ids,
+        unchanged_sections=fingerprints.unchanged_sections if fingerprints else frozenset(),
+        page_fingerprints=fingerprints.sources if fingerprints else None,
+        catalog_complete=pipeline.catalog_complete
+    )
+    if fingerprints and fingerprints.unchanged_sections:
+        print(f"Reused unchanged sections for {normalized_url}: {', '.join(sorted(fingerprints.unchanged_sections))}")
+    if partial_catalog:
+        # The crawl only carried some of the products; the stored insights hold the full catalog
+        brand_context = BrandContext.model_validate_json(db_brand.serialized_insights)
+    response_cache.put(normalized_url, db_brand.serialized_insights, db_brand.last_fetched)
+    print(f"Insights for {normalized_url} scraped and saved to DB.")
+    return brand_context
+
+async def scrape_and_save_brand_insights(db: AsyncSession, normalized_url: str, website_url: HttpUrl) -> BrandContext:
+    pipeline = await _pipeline_for(db, normalized_url, website_url)
+    brand_context = await _run_pipeline(pipeline)
+    return await _save_pipeline_result(db, normalized_url, pipeline, brand_context)
+
+async def stream_and_save_brand_insights(db: AsyncSession, normalized_url: str, website_url: HttpUrl) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    scrape_and_save_brand_insights, yielding (BrandContext field, value) as the
+    pipeline extracts each section. A delta crawl's or an incomplete harvest's
+    catalog only holds some of the products, and which one it is isn't known
+    until the harvest ends, so the catalog is yielded from the saved insights.
+    """
+    pipeline = await _pipeline_for(db, normalized_url, website_url)
+    held_back = ("product_catalog", "other_insights")
+    async for section, value in pipeline.stream():
+        if section not in held_back:
+            yield section, value
+    _ensure_found(pipeline, pipeline.brand_context)
+    brand_context = await _save_pipeline_result(db, normalized_url, pipeline, pipeline.brand_context)
+    for section in held_back:
+        yield section, getattr(brand_context, section)
+
+def is_refreshing(normalized_url: str) -> bool:
+    return normalized_url in _refreshing
+
+async def refresh_brand_insights(normalized_url: str, website_url: HttpUrl):
+    """Re-scrapes a stale brand in the background; runs with its own DB session."""
+    if normalized_url in _refreshing:
+        return
+    _refreshing.add(normalized_url)
+    try:
+        async with AsyncSessionLocal() as db:
+            await scrape_and_save_brand_insights(db, normalized_url, website_url)
+    except Exception as e:
+        print(f"Background refresh of {normalized_url} failed: {e}")
+    finally:
+        _refreshing.discard(normalized_url)
@@ -0,0 +1,119 @@
+# shopify_insights_app/services/jobs.py
+
+import asyncio
+from typing import List, Optional, Tuple
+
+from config import settings
+from database import crud
+from database.models import AsyncSessionLocal, create_db_tables
+from services import insights
+from services.http_client import open_http_client, close_http_client
+from utils.exceptions import error_status
+
+class ScrapeJobWorkers:
+    """
+    Pool of asyncio workers draining the scrape_jobs table.
+
+    The table is the queue: jobs are claimed with a conditional UPDATE, so queued
+    jobs survive restarts and several processes (API workers or standalone
+    `python -m services.jobs` workers) can share it. A job whose worker died is
+    picked up again once its lease expires: a running job's worker renews the
+    lease every JOB_LEASE_TIMEOUT / 3 seconds, so only a job nobody has renewed
+    for JOB_LEASE_TIMEOUT is reclaimed, however long the crawl itself takes.
+    """
+
+    def __init__(self, workers: int = settings.JOB_WORKERS,
+                 poll_interval: float = settings.JOB_POLL_INTERVAL,
+                 lease_timeout: int = settings.JOB_LEASE_TIMEOUT,
+                 max_attempts: int = settings.JOB_MAX_ATTEMPTS):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        for _ in range(self.workers - len(self._tasks)):
+            self._tasks.append(asyncio.create_task(self._work()))
+        if self._tasks:
+            print(f"Started {len(self._tasks)} scrape job workers.")
+
+    async def stop(self):
+        # Interrupted jobs stay 'running' and are reclaimed when their lease expires
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wakes idle workers after a submission instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    async def _claim(self) -> Optional[Tuple[str, int, str, str]]:
+        async with AsyncSessionLocal() as db:
+            db_job = await crud.claim_scrape_job_async(db, self.lease_timeout, self.max_attempts)
+            return (db_job.id, db_job.attempts, db_job.normalized_url, db_job.website_url) if db_job else None
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"Could not claim a scrape job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            try:
+                await self._run(*job)
+            except Exception as e:
+                # e.g. the job couldn't be marked finished; it is retried once its lease expires
+                print(f"Scrape job {job[0]} crashed its worker: {e}")
+
+    async def _keep_lease(self, job_id: str, attempt: int):
+        while True:
+            await asyncio.sleep(max(1.0, self.lease_timeout / 3))
+            try:
+                async with AsyncSessionLocal() as db:
+                    if not await crud.renew_scrape_job_lease_async(db, job_id, attempt):
+                        print(f"Scrape job {job_id} was reclaimed by another worker.")
+                        return
+            except Exception as e:
+                print(f"Could not renew the lease of scrape job {job_id}: {e}")
+
+    async def _run(self, job_id: str, attempt: int, normalized_url: str, website_url: str):
+        heartbeat = asyncio.create_task(self._keep_lease(job_id, attempt))
+        try:
+            async with AsyncSessionLocal() as db:
+                try:
+                    await insights.scrape_and_save_brand_insights(db, normalized_url, website_url)
+                except Exception as e:
+                    await db.rollback()
+                    status_code, detail = error_status(e)
+                    print(f"Scrape job {job_id} for {normalized_url} failed: {detail}")
+                    await crud.finish_scrape_job_async(db, job_id, crud.JOB_FAILED, status_code, detail, attempt=attempt)
+                else:
+                    await crud.finish_scrape_job_async(db, job_id, crud.JOB_SUCCEEDED, 200, attempt=attempt)
+        finally:
+            heartbeat.cancel()
+
+job_workers = ScrapeJobWorkers()
+
+async def run_standalone_workers():
+    create_db_tables()
+    await open_http_client()
+    workers = ScrapeJobWorkers(workers=max(1, settings.JOB_WORKERS))
+    workers.start()
+    try:
+        await asyncio.Event().wait() # Run until interrupted
+    finally:
+        await workers.stop()
+        await close_http_client()
+
+if __name__ == "__main__":
+    asyncio.run(run_standalone_workers())
@@ -0,0 +1,74 @@
+# shopify_insights_app/services/page_index.py
+
+import re
+from typing import Callable, List, NamedTuple, Optional
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup, Tag
+from utils.link_classifier import SOCIAL_CLASSIFIER, IMPORTANT_LINK_CLASSIFIER
+
+PRODUCT_CARD_PATTERN = re.compile(r'product-card|product-item|featured-product')
+
+
+class IndexedLink(NamedTuple):
+    element: Tag
+    href: str
+    absolute_url: Optional[str]
+    netloc: str
+    text: str
+    text_lower: str
+    social_platform: Optional[str]
+    link_category: Optional[str]
+
+
+class PageIndex:
+    """
+    Everything the homepage extractors need from the DOM, collected in one traversal:
+    every anchor with an href (resolved, classified) and every product card element.
+    """
+
+    def __init__(self, soup: BeautifulSoup, base_url: str, resolve_url: Callable[[str], Optional[str]]):
+        self.soup = soup
+        self.base_netloc = urlparse(base_url).netloc
+        self.links: List[IndexedLink] = []
+        self.product_cards: List[Tag] = []
+
+        for element in soup.find_all(True):
+            classes = element.get('class') or []
+            if any(PRODUCT_CARD_PATTERN.search(css_class) for css_class in classes):
+                self.product_cards.append(element)
+            if element.name == 'a' and element.get('href') is not None:
+                self.links.append(self._index_link(element, resolve_url))
+
+    def _index_link(self, element: Tag, resolve_url: Callable[[str], Optional[str]]) -> IndexedLink:
+        href = element['href']
+        text = element.get_text(strip=True)
+        text_lower = text.lower()
+        absolute_url = resolve_url(href)
+        netloc = urlparse(absolute_url).netloc if absolute_url else ''
+
+        link_category = None
+        if absolute_url and netloc == self.base_netloc:
+            link_category = IMPORTANT_LINK_CLASSIFIER.classify(text, absolute_url)
+
+        return IndexedLink(
+            element=element,
+            href=href,
+            absolute_url=absolute_url,
+            netloc=netloc,
+            text=text,
+            text_lower=text_lower,
+            social_platform=SOCIAL_CLASSIFIER.classify(None, href),
+            link_category=link_category
+        )
+
+    def first_link(self, href_pattern: re.Pattern) -> Optional[IndexedLink]:
+        for link in self.links:
+            if href_pattern.search(link.href):
+                return link
+        return None
+
+    def social_links(self) -> List[IndexedLink]:
+        return [link for link in self.links if link.social_platform]
+
+    def important_links(self) -> List[IndexedLink]:
+        return [link for link in self.links if link.link_category]
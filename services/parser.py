@@ -1,57 +1,102 @@
 import re
-from typing import List, Dict, Optional, Tuple
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer
 from models.brand_data import Product, Policy, FAQItem, ContactDetails, SocialHandle, ImportantLink, BrandContext
+from services.page_index import PageIndex
+from services.html_parser import html_to_text
+from config import settings
+
+# Partial-parse filters: only these elements (and their subtrees) are built for
+# pages that are fetched for a single extractor.
+POLICY_PAGE_STRAINER = SoupStrainer(['main', 'article', 'h1'])
+FAQ_PAGE_STRAINER = SoupStrainer(class_=re.compile(r'faq-section|accordion|faq-list'))
+HOMEPAGE_HEAD_STRAINER = SoupStrainer('head') # Enough for parse_brand_name
+
+# Version of what the page extractors below produce. Part of every page
+# fingerprint (services.fingerprints): bump it whenever extraction logic or the
+# shape of an extracted section changes, so sections stored from unchanged
+# pages are re-extracted instead of reused.
+EXTRACTOR_VERSION = 1
 
 class ShopifyParser:
     def __init__(self, base_url: str):
         self.base_url = base_url
         self.scraped_urls = set() # To prevent infinite loops with internal links
+        self._page_indexes: Dict[int, PageIndex] = {}
 
     def _get_absolute_url(self, relative_url: str) -> Optional[str]:
         if relative_url and not relative_url.startswith('javascript:'):
             return urljoin(self.base_url, relative_url)
         return None
 
+    def index_page(self, soup: BeautifulSoup) -> PageIndex:
+        # Built once per soup and shared by every extractor that looks at links or product cards
+        page_index = self._page_indexes.get(id(soup))
+        if page_index is None or page_index.soup is not soup:
+            page_index = PageIndex(soup, self.base_url, self._get_absolute_url)
+            self._page_indexes[id(soup)] = page_index
+        return page_index
+
+    def parse_product(self, item: Dict) -> Optional[Product]:
+        try:
+            price = None
+            currency = None
+            if item.get('variants'):
+                first_variant = item['variants'][0]
+                price = first_variant.get('price')
+                currency = "USD" # Placeholder, actual scraping needed
+
+            image_url = None
+            if item.get('images'):
+                image_url = item['images'][0].get('src')
+
+            handle = item.get('handle')
+            product_url = None
+            if handle:
+                product_url = self._get_absolute_url(f"/products/{handle}")
+
+            variants = [
+                {
+                    'id': variant.get('id'),
+                    'title': variant.get('title'),
+                    'price': variant.get('price'),
+                    'sku': variant.get('sku'),
+                    'available': variant.get('available'),
+                } for variant in item.get('variants') or []
+            ]
+
+            return Product(
+                title=item.get('title', 'N/A'),
+                price=price,
+                currency=currency,
+                image_url=image_url,
+                product_url=product_url,
+                description=html_to_text(item.get('body_html')) if settings.COMPACT_CATALOG_STORAGE else item.get('body_html'),
+                shopify_id=item.get('id'),
+                updated_at=item.get('updated_at'),
+                variants=variants
+            )
+        except Exception as e:
+            print(f"Error parsing product: {e} - Data: {item}")
+            return None
+
+    def iter_product_catalog(self, items: Iterable[Dict]) -> Iterator[Product]:
+        # Lazily parses raw products.json items, so pages can be streamed through without buffering
+        for item in items:
+            product = self.parse_product(item)
+            if product:
+                yield product
+
     def parse_product_catalog(self, products_json: Dict) -> List[Product]:
-        products = []
         if products_json and 'products' in products_json:
-            for item in products_json['products']:
-                try:
-                    price = None
-                    currency = None
-                    if item.get('variants'):
-                        first_variant = item['variants'][0]
-                        price = first_variant.get('price')
-                        currency = "USD" # Placeholder, actual scraping needed
-
-                    image_url = None
-                    if item.get('images'):
-                        image_url = item['images'][0].get('src')
-
-                    handle = item.get('handle')
-                    product_url = None
-                    if handle:
-                        product_url = self._get_absolute_url(f"/products/{handle}")
-
-                    products.append(Product(
-                        title=item.get('title', 'N/A'),
-                        price=price,
-                        currency=currency,
-                        image_url=image_url,
-                        product_url=product_url,
-                        description=item.get('body_html')
-                    ))
-                except Exception as e:
-                    print(f"Error parsing product: {e} - Data: {item}")
-        return products
+            return list(self.iter_product_catalog(products_json['products']))
+        return []
 
     def parse_hero_products(self, soup: BeautifulSoup) -> List[Product]:
         hero_products = []
         try:
-            product_card_elements = soup.find_all(class_=re.compile(r'product-card|product-item|featured-product'))
-            for card in product_card_elements:
+            for card in self.index_page(soup).product_cards:
                 title_elem = card.find(class_=re.compile(r'product-card__title|product-item__title|product-title'))
                 price_elem = card.find(class_=re.compile(r'price-item|product-card__price'))
                 img_elem = card.find('img')
@@ -134,39 +179,26 @@ class ShopifyParser:
 
     def parse_social_handles(self, soup: BeautifulSoup) -> List[SocialHandle]:
         social_handles = []
-        social_platforms = {
-            'facebook': ['facebook.com', 'fb.me'],
-            'instagram': ['instagram.com'],
-            'twitter': ['twitter.com', 'x.com'],
-            'linkedin': ['linkedin.com'],
-            'youtube': ['youtube.com'], # Corrected YouTube domain
-            'pinterest': ['pinterest.com'],
-            'tiktok': ['tiktok.com']
-        }
-
-        links = soup.find_all('a', href=True)
-        for link in links:
-            href = link['href']
-            for platform, keywords in social_platforms.items():
-                if any(keyword in href for keyword in keywords):
-                    if not any(s.url == href for s in social_handles):
-                        # Ensure URL is absolute for Pydantic HttpUrl validation
-                        absolute_href = self._get_absolute_url(href)
-                        if absolute_href:
-                            social_handles.append(SocialHandle(platform=platform, url=absolute_href))
-                    break
+        seen_urls = set()
+        for link in self.index_page(soup).social_links():
+            # Ensure URL is absolute for Pydantic HttpUrl validation
+            if link.absolute_url and link.absolute_url not in seen_urls:
+                seen_urls.add(link.absolute_url)
+                social_handles.append(SocialHandle(platform=link.social_platform, url=link.absolute_url))
         return social_handles
 
     def parse_contact_details(self, soup: BeautifulSoup) -> ContactDetails:
         emails = set()
         phone_numbers = set()
 
+        page_text = soup.get_text()
+
         email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        for match in re.finditer(email_pattern, soup.get_text()):
+        for match in re.finditer(email_pattern, page_text):
             emails.add(match.group(0))
 
         phone_pattern = r'(?:\+?(\d{1,3}))?[-. (]*(\d{3})[-. )]*(\d{3})[-. ]*(\d{4})(?: *x(\d+))?'
-        for match in re.finditer(phone_pattern, soup.get_text()):
+        for match in re.finditer(phone_pattern, page_text):
             groups = [g for g in match.groups() if g is not None]
             phone_numbers.add("".join(groups))
             
@@ -191,32 +223,21 @@ class ShopifyParser:
 
         return "\n\n".join(text_content) if text_content else None
 
+    def parse_brand_name(self, soup: BeautifulSoup) -> Optional[str]:
+        title_tag = soup.find('title')
+        if title_tag:
+            brand_name = title_tag.get_text(strip=True)
+            brand_name = re.sub(r'\s*\|\s*Shopify.*$', '', brand_name, flags=re.IGNORECASE)
+            brand_name = re.sub(r'\s*-\s*Powered by Shopify.*$', '', brand_name, flags=re.IGNORECASE)
+            return brand_name.strip()
+        return None
+
 
     def parse_important_links(self, soup: BeautifulSoup) -> List[ImportantLink]:
         important_links = []
-        
-        link_keywords = {
-            "Order tracking": ["track order", "order status", "my orders"],
-            "Contact Us": ["contact", "support", "help center"],
-            "Blogs": ["blog", "news"],
-            "Shipping": ["shipping", "delivery"],
-            "Careers": ["careers", "jobs"],
-            "Terms of Service": ["terms of service", "terms & conditions"],
-            "Privacy Policy": ["privacy policy"],
-            "Refund Policy": ["refund policy", "return policy"]
-        }
-
-        all_links = soup.find_all('a', href=True)
-        for link_element in all_links:
-            href = link_element['href']
-            text = link_element.get_text(strip=True)
-            absolute_url = self._get_absolute_url(href)
-
-            if absolute_url and urlparse(absolute_url).netloc == urlparse(self.base_url).netloc:
-                for category, keywords in link_keywords.items():
-                    if any(kw.lower() in text.lower() for kw in keywords) or \
-                       any(kw.lower().replace(' ', '-') in absolute_url.lower() for kw in keywords):
-                        if not any(imp_link.url == absolute_url for imp_link in important_links):
-                            important_links.append(ImportantLink(text=text if text else category, url=absolute_url))
-                        break
+        seen_urls = set()
+        for link in self.index_page(soup).important_links():
+            if link.absolute_url not in seen_urls:
+                seen_urls.add(link.absolute_url)
+                important_links.append(ImportantLink(text=link.text if link.text else link.link_category, url=link.absolute_url))
         return important_links
\ No newline at end of file
@@ -0,0 +1,274 @@
+# shopify_insights_app/services/pipeline.py
+
+import asyncio
+import re
+from typing import Any, AsyncIterator, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+from pydantic import HttpUrl
+
+from services.scraper import WebScraper
+from services.parser import ShopifyParser, POLICY_PAGE_STRAINER, FAQ_PAGE_STRAINER, HOMEPAGE_HEAD_STRAINER
+from services.html_parser import make_soup
+from services.catalog import CatalogHarvester, CatalogDelta
+from services.fingerprints import PageFingerprints
+from models.brand_data import BrandContext, Product
+from utils.helpers import first_success
+
+PRIVACY_POLICY_PATHS = ["/policies/privacy-policy", "/pages/privacy-policy"]
+RETURN_REFUND_POLICY_PATHS = ["/policies/refund-policy", "/policies/returns-policy", "/pages/return-policy"]
+FAQ_PATHS = ["/pages/faqs", "/community/faq", "/apps/help-center/faq"]
+
+PRIVACY_LINK_PATTERN = re.compile(r'privacy-policy|privacy', re.IGNORECASE)
+RETURN_REFUND_LINK_PATTERN = re.compile(r'refund-policy|return-policy|returns', re.IGNORECASE)
+FAQ_LINK_PATTERN = re.compile(r'faq|frequently-asked-questions|help', re.IGNORECASE)
+
+SECTION_PATHS = {
+    "privacy_policy": PRIVACY_POLICY_PATHS,
+    "return_refund_policy": RETURN_REFUND_POLICY_PATHS,
+    "faqs": FAQ_PATHS,
+}
+SECTION_LINK_PATTERNS = {
+    "privacy_policy": PRIVACY_LINK_PATTERN,
+    "return_refund_policy": RETURN_REFUND_LINK_PATTERN,
+    "faqs": FAQ_LINK_PATTERN,
+}
+
+# What each BrandContext field needs: the products.json harvest, the homepage,
+# or its own probe (plus the homepage, for link fallbacks, only if the probe fails).
+CATALOG_SECTIONS = ("product_catalog", "other_insights")
+HOMEPAGE_SECTIONS = ("brand_name", "hero_products", "social_handles", "contact_details", "brand_text_context", "important_links")
+HEAD_SECTIONS = frozenset({"brand_name"}) # Need only the homepage's <head>
+ALL_SECTIONS = frozenset(CATALOG_SECTIONS + HOMEPAGE_SECTIONS) | frozenset(SECTION_PATHS)
+
+
+def parse_fields(fields: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """
+    Requested BrandContext fields, or None for all of them. Raises ValueError on
+    unknown names, and on a selection naming no field (e.g. `fields=` or just
+    website_url, which is always included), since there'd be nothing to scrape.
+    """
+    if fields is None:
+        return None
+    requested = frozenset(field.strip() for field in fields if field.strip()) - {"website_url"}
+    unknown = requested - ALL_SECTIONS
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Valid fields: {', '.join(sorted(ALL_SECTIONS))}.")
+    if not requested:
+        raise ValueError(f"No fields selected. Name at least one of: {', '.join(sorted(ALL_SECTIONS))}, or omit fields for all of them.")
+    return None if requested == ALL_SECTIONS else requested
+
+
+class InsightsPipeline:
+    """
+    Scrapes a Shopify store into a BrandContext.
+
+    Independent fetches are issued concurrently: the paginated products.json
+    harvest, the homepage and every policy/FAQ candidate path go out together, and the homepage link
+    fallbacks for anything that wasn't found are fetched as soon as both the homepage and that
+    section's probe are done.
+
+    With `fields`, only the fetches and extractors those BrandContext fields
+    depend on run (see parse_fields); the other fields keep their defaults.
+
+    With `page_fingerprints`, sections whose source page hasn't changed since
+    the last crawl are reused rather than parsed (see PageFingerprints).
+    """
+
+    def __init__(self, normalized_url: str, website_url: HttpUrl,
+                 known_product_versions: Optional[Dict[int, Optional[str]]] = None,
+                 fields: Optional[FrozenSet[str]] = None,
+                 page_fingerprints: Optional[PageFingerprints] = None):
+        self.base_url = normalized_url
+        self.website_url = website_url
+        self.fields = ALL_SECTIONS if fields is None else frozenset(fields)
+        if not self.fields:
+            raise ValueError("InsightsPipeline needs at least one field to extract (fields=None for all of them).")
+        self.parser = ShopifyParser(normalized_url)
+        self.brand_context = BrandContext(website_url=website_url)
+        self.homepage_fetched = False
+        self.catalog_fetched = False
+        self.catalog_complete = False # The harvest reached the end of the catalog (see CatalogHarvester)
+        self.sections_found = False # A policy/FAQ page yielded content
+        self._homepage_soup = None
+        # With known versions, products whose updated_at hasn't moved are skipped
+        # and left out of product_catalog (see CatalogDelta.unchanged_ids).
+        self.catalog_delta = CatalogDelta(known_product_versions) if known_product_versions is not None else None
+        self.page_fingerprints = page_fingerprints
+
+    async def _probe(self, scraper: WebScraper, section: str, paths: List[str]):
+        # All candidates are fetched at once; the first (in list order) that yields content wins
+        # and the requests still in flight for lower-priority paths are cancelled.
+        async def candidate(url: str):
+            value = self._parse_section(section, (url, await scraper.fetch_text(url)))
+            return (url, value) if value else None
+
+        return await first_success([candidate(urljoin(self.base_url, path)) for path in paths])
+
+    async def _follow_link(self, scraper: WebScraper, homepage_soup, pattern: re.Pattern) -> Tuple[Optional[str], Optional[str]]:
+        link = self.parser.index_page(homepage_soup).first_link(pattern)
+        if link and link.absolute_url:
+            return link.absolute_url, await scraper.fetch_text(link.absolute_url)
+        return None, None
+
+    async def _harvest_catalog(self, scraper: WebScraper) -> Optional[List[Product]]:
+        def convert(item: Dict) -> Optional[Product]:
+            if self.catalog_delta and not self.catalog_delta.needs_update(item):
+                return None
+            return self.parser.parse_product(item)
+
+        # Products are parsed as they stream in; raw items are never held a page at a time
+        harvester = CatalogHarvester(scraper, convert=convert)
+        products = []
+        async for page in harvester.iter_pages():
+            products.extend(page)
+        self.catalog_fetched = harvester.reachable
+        self.catalog_complete = harvester.complete
+        return products if harvester.reachable else None
+
+    def _extract_section(self, section: str, soup, page_url: Optional[str]):
+        if section == "faqs":
+            return self.parser.parse_faqs(soup)
+        return self.parser.parse_policy(soup, section, page_url=page_url)
+
+    def _parse_section(self, section: str, page: Tuple[Optional[str], Optional[str]]):
+        page_url, markup = page
+        if markup is None:
+            return None
+        if self.page_fingerprints and self.page_fingerprints.unchanged(section, page_url, markup):
+            return self.page_fingerprints.previous_value(section)
+        # Build only the elements the extractor looks at; if the page keeps its
+        # content somewhere unusual, retry once against the full tree.
+        strainer = FAQ_PAGE_STRAINER if section == "faqs" else POLICY_PAGE_STRAINER
+        result = self._extract_section(section, make_soup(markup, parse_only=strainer), page_url)
+        if not result:
+            result = self._extract_section(section, make_soup(markup), page_url)
+        return result
+
+    def _finish_section(self, section: str, value, page_url: Optional[str] = None) -> Tuple[str, Any]:
+        if section == "faqs":
+            value = value or []
+        if value:
+            self.sections_found = True
+            if self.page_fingerprints and page_url:
+                self.page_fingerprints.record(section, page_url, [section])
+        setattr(self.brand_context, section, value)
+        return section, value
+
+    def _full_homepage_soup(self, markup: str):
+        if self._homepage_soup is None:
+            self._homepage_soup = make_soup(markup)
+        return self._homepage_soup
+
+    def _homepage_sections(self, markup: Optional[str]) -> List[Tuple[str, Any]]:
+        requested = [section for section in HOMEPAGE_SECTIONS if section in self.fields]
+        if markup is not None:
+            self.homepage_fetched = True
+            homepage_url = urljoin(self.base_url, "/")
+            if requested and self.page_fingerprints and self.page_fingerprints.unchanged("homepage", homepage_url, markup):
+                for section in requested:
+                    setattr(self.brand_context, section, self.page_fingerprints.previous_value(section))
+            elif requested:
+                # A brand-name-only request doesn't need the body built at all
+                soup = make_soup(markup, parse_only=HOMEPAGE_HEAD_STRAINER) if HEAD_SECTIONS.issuperset(requested) \
+                    else self._full_homepage_soup(markup)
+                extractors = {
+                    "brand_name": self.parser.parse_brand_name,
+                    "hero_products": self.parser.parse_hero_products,
+                    "social_handles": self.parser.parse_social_handles,
+                    "contact_details": self.parser.parse_contact_details,
+                    "brand_text_context": self.parser.parse_brand_text_context,
+                    "important_links": self.parser.parse_important_links,
+                }
+                for section in requested:
+                    setattr(self.brand_context, section, extractors[section](soup))
+            if requested and self.page_fingerprints:
+                self.page_fingerprints.record("homepage", homepage_url, requested)
+        return [(section, getattr(self.brand_context, section)) for section in requested]
+
+    def _catalog_sections(self, product_catalog: Optional[List[Product]]) -> List[Tuple[str, Any]]:
+        if product_catalog is not None:
+            self.brand_context.product_catalog = product_catalog
+            if self.catalog_delta:
+                self.brand_context.other_insights["catalog_sync"] = self.catalog_delta.summary(self.catalog_complete)
+        else:
+            print(f"Warning: Could not fetch products.json for {self.base_url}. It might not be a standard Shopify store or products are hidden.")
+        return [(section, getattr(self.brand_context, section)) for section in CATALOG_SECTIONS if section in self.fields]
+
+    async def stream(self) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yields (BrandContext field, value) as soon as each requested section is
+        extracted, every requested field exactly once, so the homepage sections
+        don't wait on the catalog harvest or a slow FAQ probe. self.brand_context
+        is complete once the stream ends.
+        """
+        self.brand_context = BrandContext(website_url=self.website_url)
+        self._homepage_soup = None
+
+        async with WebScraper(self.base_url) as scraper:
+            tasks: Dict[asyncio.Task, Tuple[str, Optional[str]]] = {}
+
+            def start(kind: str, section: Optional[str], coro):
+                tasks[asyncio.create_task(coro)] = (kind, section)
+
+            if self.fields.intersection(CATALOG_SECTIONS):
+                start("catalog", None, self._harvest_catalog(scraper))
+            # Without homepage fields, the homepage is only fetched if a probe needs its links
+            homepage_started = bool(self.fields.intersection(HOMEPAGE_SECTIONS))
+            if homepage_started:
+                start("homepage", None, scraper.fetch_text("/"))
+            for section, paths in SECTION_PATHS.items():
+                if section in self.fields:
+                    start("probe", section, self._probe(scraper, section, paths))
+
+            homepage_done, homepage_markup = False, None
+            awaiting_homepage = [] # Sections the common paths didn't yield
+
+            def follow_link(section: str):
+                homepage_soup = self._full_homepage_soup(homepage_markup)
+                start("link", section, self._follow_link(scraper, homepage_soup, SECTION_LINK_PATTERNS[section]))
+
+            try:
+                while tasks:
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        kind, section = tasks.pop(task)
+                        result = task.result()
+                        if kind == "catalog":
+                            for item in self._catalog_sections(result):
+                                yield item
+                        elif kind == "homepage":
+                            homepage_done, homepage_markup = True, result
+                            for item in self._homepage_sections(homepage_markup):
+                                yield item
+                            # Fall back to links on the homepage for anything the common paths didn't yield.
+                            for missing in awaiting_homepage:
+                                if homepage_markup is not None:
+                                    follow_link(missing)
+                                else:
+                                    yield self._finish_section(missing, None)
+                            awaiting_homepage = []
+                        elif kind == "probe":
+                            if result:
+                                page_url, value = result
+                                yield self._finish_section(section, value, page_url)
+                            elif not homepage_done:
+                                awaiting_homepage.append(section)
+                                if not homepage_started:
+                                    homepage_started = True
+                                    start("homepage", None, scraper.fetch_text("/"))
+                            elif homepage_markup is not None:
+                                follow_link(section)
+                            else:
+                                yield self._finish_section(section, None)
+                        else:
+                            value = self._parse_section(section, result) if result[1] is not None else None
+                            yield self._finish_section(section, value, result[0])
+            finally:
+                # The consumer stopped early (or a fetch failed): don't leave requests running
+                for task in tasks:
+                    task.cancel()
+
+    async def run(self) -> BrandContext:
+        async for _ in self.stream():
+            pass
+        return self.brand_context
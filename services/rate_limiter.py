@@ -0,0 +1,113 @@
+# shopify_insights_app/services/rate_limiter.py
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import httpx
+from config import settings
+
+class TokenBucket:
+    """
+    `rate` requests per second with bursts of up to `burst`. The rate backs off
+    multiplicatively when the host throttles us and creeps back up towards
+    `max_rate` with every request that gets through (AIMD).
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0 # From Retry-After / 429 backoff
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class HostRateLimiter:
+    """Per-host token buckets shared by every scraper in the process."""
+
+    def __init__(self, rate: float, burst: int, min_rate: float, default_backoff: float):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.default_backoff = default_backoff
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.throttled = 0 # 429 / Retry-After responses seen
+        self.waits = 0     # acquisitions that had to sleep
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst, self.min_rate)
+        return bucket
+
+    async def acquire(self, host: str):
+        """Waits for a request slot on `host`. Waiters for the same host are served in turn."""
+        bucket = self._bucket(host)
+        async with bucket.lock:
+            waited = False
+            while True:
+                delay = bucket.wait_time()
+                if delay <= 0:
+                    break
+                waited = True
+                await asyncio.sleep(delay)
+            bucket.tokens -= 1
+            if waited:
+                self.waits += 1
+
+    def record_success(self, host: str):
+        bucket = self._bucket(host)
+        bucket.rate = min(bucket.max_rate, bucket.rate + bucket.max_rate / 20)
+
+    def record_throttled(self, host: str, retry_after: Optional[float]) -> float:
+        """Pauses `host` for Retry-After (or the default backoff), halves its rate, and returns the pause."""
+        bucket = self._bucket(host)
+        delay = retry_after if retry_after is not None else self.default_backoff
+        bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+        bucket.tokens = 0.0
+        bucket.rate = max(bucket.min_rate, bucket.rate / 2)
+        self.throttled += 1
+        return delay
+
+    def stats(self) -> Dict[str, int]:
+        return {"hosts": len(self._buckets), "throttled": self.throttled, "waits": self.waits}
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Retry-After as seconds; the header may be delta-seconds or an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def is_throttled(response: httpx.Response) -> bool:
+    return response.status_code == 429 or (response.status_code == 503 and "Retry-After" in response.headers)
+
+rate_limiter = HostRateLimiter(
+    settings.RATE_LIMIT_RATE, settings.RATE_LIMIT_BURST, settings.RATE_LIMIT_MIN_RATE, settings.RATE_LIMIT_DEFAULT_BACKOFF
+) if settings.RATE_LIMIT_ENABLED else None
@@ -1,42 +1,186 @@
 # shopify_insights_app/services/scraper.py
 
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from typing import Optional, Dict
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+from urllib.parse import urljoin
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from config import settings # Import settings
+from services.html_parser import make_soup
+from services.http_cache import http_cache, HTTPCache
+from services.http_client import build_client, get_http_client
+from services.rate_limiter import rate_limiter, HostRateLimiter, retry_after_seconds, is_throttled
+from utils.exceptions import RateLimitExceededError
+
+try:
+    import ijson
+except ImportError: # Optional: products.json is then decoded in one piece
+    ijson = None
 
 class WebScraper:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, cache: Optional[HTTPCache] = http_cache,
+                 limiter: Optional[HostRateLimiter] = rate_limiter,
+                 client: Optional[httpx.AsyncClient] = None):
         self.base_url = base_url
-        self.session = requests.Session()
-        self.headers = {
-            'User-Agent': settings.DEFAULT_USER_AGENT # Use user agent from config
-        }
+        self.cache = cache
+        self.limiter = limiter
+        # Use the app-wide pooled client when there is one; only a client we built ourselves is closed here
+        self.client = client or get_http_client()
+        self._owns_client = self.client is None
+        if self._owns_client:
+            self.client = build_client()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def _get(self, url: str, headers: Optional[Dict], stream: bool) -> httpx.Response:
+        if stream: # Caller reads the body incrementally and must close the response
+            return await self.client.send(self.client.build_request("GET", url, headers=headers), stream=True)
+        return await self.client.get(url, headers=headers)
+
+    async def _send(self, url: str, headers: Optional[Dict], stream: bool = False) -> httpx.Response:
+        """GET under the per-host rate limit, waiting out 429s / Retry-After up to RATE_LIMIT_MAX_RETRIES times."""
+        if not self.limiter:
+            return await self._get(url, headers, stream)
+
+        host = httpx.URL(url).host
+        for attempt in range(settings.RATE_LIMIT_MAX_RETRIES + 1):
+            await self.limiter.acquire(host)
+            response = await self._get(url, headers, stream)
+            if not is_throttled(response):
+                self.limiter.record_success(host)
+                return response
+            await response.aclose()
+            delay = self.limiter.record_throttled(host, retry_after_seconds(response))
+            print(f"Throttled by {host} ({response.status_code}), pausing {delay:.1f}s")
+            if delay > settings.RATE_LIMIT_MAX_RETRY_AFTER:
+                break
+        raise RateLimitExceededError(f"{host} is rate limiting requests; try again later.")
 
-    def _make_request(self, url: str) -> Optional[requests.Response]:
+    async def _make_request(self, url: str, params: Optional[Dict] = None) -> Optional[httpx.Response]:
         try:
-            response = self.session.get(url, headers=self.headers, timeout=settings.REQUEST_TIMEOUT) # Use timeout from config
-            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+            request_url = str(httpx.URL(url, params=params)) if params else url
+            entry = await self.cache.lookup(request_url) if self.cache else None
+            headers = HTTPCache.conditional_headers(entry) if entry else None
+
+            response = await self._send(request_url, headers)
+            if response.status_code == 304 and entry:
+                return await self.cache.not_modified(request_url, entry, response.request)
+
+            response.raise_for_status() # Raise HTTPStatusError for bad responses (4xx or 5xx)
+            if self.cache:
+                await self.cache.store(request_url, response)
             return response
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Error fetching {url}: {e}")
             return None
 
-    def fetch_html(self, path: str = "") -> Optional[BeautifulSoup]:
+    async def fetch_text(self, path: str = "") -> Optional[str]:
         url = urljoin(self.base_url, path)
-        response = self._make_request(url)
+        response = await self._make_request(url)
         if response:
-            return BeautifulSoup(response.text, 'html.parser')
+            return response.text
+        return None
+
+    async def fetch_html(self, path: str = "", parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
+        markup = await self.fetch_text(path)
+        if markup is not None:
+            return make_soup(markup, parse_only=parse_only)
         return None
 
-    def fetch_json(self, path: str = "") -> Optional[Dict]:
+    async def fetch_json(self, path: str = "", params: Optional[Dict] = None) -> Optional[Dict]:
         url = urljoin(self.base_url, path)
-        response = self._make_request(url)
+        response = await self._make_request(url, params=params)
         if response:
             try:
                 return response.json()
-            except requests.exceptions.JSONDecodeError: # Corrected exception name
+            except ValueError: # httpx surfaces JSON decode failures as ValueError
                 print(f"Could not decode JSON from {url}")
                 return None
-        return None
\ No newline at end of file
+        return None
+
+    async def fetch_json_items(self, path: str, key: str, params: Optional[Dict] = None,
+                               convert: Optional[Callable[[Dict], Any]] = None) -> Optional[List]:
+        """
+        The items of the top-level array `key` of a JSON response, each passed
+        through `convert` as soon as it is decoded (None results are dropped), or
+        None if the request failed. With ijson the body is decoded as it streams
+        in, so neither the whole body nor all raw items are held at once; without
+        it this falls back to fetch_json.
+        """
+        if ijson is None:
+            data = await self.fetch_json(path, params=params)
+            if data is None:
+                return None
+            decoder = JSONItemDecoder(key, convert)
+            decoder.extend(data.get(key) or [])
+            return decoder.results
+
+        url = urljoin(self.base_url, path)
+        request_url = str(httpx.URL(url, params=params)) if params else url
+        entry = await self.cache.lookup(request_url) if self.cache else None
+        headers = HTTPCache.conditional_headers(entry) if entry else None
+        decoder = JSONItemDecoder(key, convert)
+        try:
+            response = await self._send(request_url, headers, stream=True)
+            try:
+                if response.status_code == 304 and entry:
+                    decoder.feed((await self.cache.not_modified(request_url, entry, response.request)).content)
+                    return decoder.close()
+
+                response.raise_for_status()
+                # Keep a copy for the HTTP cache only while the body stays small
+                body = bytearray() if self.cache else None
+                async for chunk in response.aiter_bytes():
+                    decoder.feed(chunk)
+                    if body is not None:
+                        if len(body) + len(chunk) <= settings.HTTP_CACHE_MAX_STREAMED_BYTES:
+                            body += chunk
+                        else:
+                            body = None
+                results = decoder.close()
+                if body is not None:
+                    await self.cache.store_body(request_url, response.headers, body.decode(response.encoding or "utf-8"))
+                return results
+            finally:
+                await response.aclose()
+        except httpx.HTTPError as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+        except ijson.JSONError:
+            print(f"Could not decode JSON from {url}")
+            return None
+
+
+class JSONItemDecoder:
+    """Decodes the items of the top-level array `key` from JSON fed in chunks."""
+
+    def __init__(self, key: str, convert: Optional[Callable[[Dict], Any]] = None):
+        self.convert = convert
+        self.results: List = []
+        if ijson is not None:
+            self._decoded = ijson.sendable_list()
+            self._coroutine = ijson.items_coro(self._decoded, f"{key}.item", use_float=True)
+
+    def extend(self, items: Iterable[Dict]):
+        for item in items:
+            result = self.convert(item) if self.convert else item
+            if result is not None:
+                self.results.append(result)
+
+    def feed(self, chunk: bytes):
+        self._coroutine.send(chunk)
+        self.extend(self._decoded)
+        del self._decoded[:]
+
+    def close(self) -> List:
+        self._coroutine.close()
+        self.extend(self._decoded)
+        del self._decoded[:]
+        return self.results
@@ -0,0 +1,21 @@
+# shopify_insights_app/services/streaming.py
+
+import json
+from typing import Any
+from pydantic_core import to_json
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def section_event(section: str, data: Any, stream_format: str) -> bytes:
+    """
+    One streamed section: an NDJSON line {"section": ..., "data": ...} or an SSE
+    event named after the section. `data` may be a model, a list of models or
+    plain JSON data; bytes are taken to be serialized JSON already.
+    """
+    payload = data if isinstance(data, bytes) else to_json(data)
+    if stream_format == "sse":
+        return b"event: " + section.encode("utf-8") + b"\ndata: " + payload + b"\n\n"
+    return b'{"section": ' + json.dumps(section).encode("utf-8") + b', "data": ' + payload + b"}\n"
@@ -0,0 +1,36 @@
+# shopify_insights_app/tests/conftest.py
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import Base
+
+# The models use MySQL column types; render them as their SQLite equivalents
+@compiles(LONGBLOB, "sqlite")
+def _compile_longblob(element, compiler, **kw):
+    return "BLOB"
+
+@compiles(LONGTEXT, "sqlite")
+def _compile_longtext(element, compiler, **kw):
+    return "TEXT"
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
@@ -0,0 +1,73 @@
+# shopify_insights_app/tests/test_compact_storage.py
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from config import settings
+from database.compact import PLAIN_JSON, pack
+from database.models import Base, BrandDB, ProductDB
+
+DESCRIPTION = "<p>Soft cotton tee</p>"
+VARIANTS = [{"id": 1, "price": "9.99", "title": "Default"}]
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path):
+    """Opens the database as a deployment with the given flag would; the schema is created on first use."""
+    engines = []
+
+    def make(compact: bool):
+        monkeypatch.setattr(settings, "COMPACT_CATALOG_STORAGE", compact)
+        engine = create_engine(f"sqlite:///{tmp_path / 'insights.db'}")
+        if not engines:
+            Base.metadata.create_all(engine)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+def add_product(engine) -> int:
+    with Session(engine) as db:
+        brand = BrandDB(website_url="https://acme.example/")
+        db.add(brand)
+        db.flush()
+        product = ProductDB(brand_id=brand.id, title="Tee", description=DESCRIPTION, variants=VARIANTS)
+        db.add(product)
+        db.commit()
+        return product.id
+
+def read_product(engine, product_id: int):
+    with Session(engine) as db:
+        product = db.get(ProductDB, product_id)
+        return product.description, product.variants
+
+def raw_columns(engine, product_id: int):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT description, variants FROM products WHERE id = :id"), {"id": product_id}).one()
+
+def test_flag_off_writes_legacy_untagged_values(storage):
+    engine = storage(compact=False)
+    product_id = add_product(engine)
+
+    # Readable by the LONGTEXT/JSON columns of a database that was never converted
+    assert tuple(raw_columns(engine, product_id)) == (DESCRIPTION, '[{"id": 1, "price": "9.99", "title": "Default"}]')
+    assert read_product(engine, product_id) == (DESCRIPTION, VARIANTS)
+
+def test_tagged_values_returned_as_text_are_decoded(storage):
+    engine = storage(compact=False)
+    product_id = add_product(engine)
+    # What a tagged write to an unconverted LONGTEXT column leaves behind
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE products SET description = :description WHERE id = :id"),
+                     {"description": pack(DESCRIPTION, PLAIN_JSON).decode("utf-8"), "id": product_id})
+
+    assert read_product(engine, product_id) == (DESCRIPTION, VARIANTS)
+
+def test_compressed_values_stay_readable_with_flag_off(storage):
+    engine = storage(compact=True)
+    product_id = add_product(engine)
+    assert bytes(raw_columns(engine, product_id)[1])[:1] != b"["
+
+    assert read_product(storage(compact=False), product_id) == (DESCRIPTION, VARIANTS)
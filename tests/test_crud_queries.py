@@ -0,0 +1,53 @@
+# shopify_insights_app/tests/test_crud_queries.py
+
+import pytest
+from sqlalchemy import event
+
+from database import crud
+from models.brand_data import BrandContext, ContactDetails, FAQItem, ImportantLink, Policy, Product, SocialHandle
+
+WEBSITE_URL = "https://acme.example/"
+
+# The brand row with its one-to-one children joined on, then one SELECT ... IN
+# per collection: products, hero products, FAQs, social handles, important links
+BRAND_WITH_CHILDREN_QUERIES = 6
+
+def brand_context(product_count: int) -> BrandContext:
+    return BrandContext(
+        website_url=WEBSITE_URL,
+        brand_name="Acme",
+        product_catalog=[
+            Product(title=f"Product {i}", price="9.99", shopify_id=i, updated_at="2024-01-01",
+                    product_url=f"https://acme.example/products/p{i}", variants=[{"id": i, "price": "9.99"}])
+            for i in range(product_count)
+        ],
+        hero_products=[Product(title="Hero", product_url="https://acme.example/products/hero")],
+        privacy_policy=Policy(title="Privacy", content="We respect privacy", url="https://acme.example/policies/privacy-policy"),
+        return_refund_policy=Policy(title="Refunds", content="30 days", url="https://acme.example/policies/refund-policy"),
+        faqs=[FAQItem(question="Q?", answer="A")],
+        social_handles=[SocialHandle(platform="instagram", url="https://instagram.com/acme")],
+        contact_details=ContactDetails(emails=["hello@acme.example"], phone_numbers=["5551234567"]),
+        important_links=[ImportantLink(text="Contact us", url="https://acme.example/pages/contact")],
+    )
+
+def count_queries(engine, func):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = func()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, len(statements)
+
+@pytest.mark.parametrize("product_count", [1, 25, 200])
+def test_brand_insights_load_in_fixed_number_of_queries(engine, db, product_count):
+    crud.create_brand_insights(db, brand_context(product_count))
+    db.expunge_all()
+
+    loaded, queries = count_queries(engine, lambda: crud.get_brand_insights_from_db(db, WEBSITE_URL))
+
+    assert queries == BRAND_WITH_CHILDREN_QUERIES
+    assert len(loaded.product_catalog) == product_count
+    assert loaded.privacy_policy.content == "We respect privacy"
+    assert loaded.contact_details.emails == ["hello@acme.example"]
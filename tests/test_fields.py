@@ -0,0 +1,21 @@
+# shopify_insights_app/tests/test_fields.py
+
+import pytest
+
+from services.pipeline import ALL_SECTIONS, parse_fields
+
+def test_no_selection_means_all_fields():
+    assert parse_fields(None) is None
+    assert parse_fields(sorted(ALL_SECTIONS) + ["website_url"]) is None
+
+def test_selection_is_trimmed_and_website_url_implied():
+    assert parse_fields([" faqs", "website_url", "brand_name ", ""]) == {"faqs", "brand_name"}
+
+@pytest.mark.parametrize("fields", [[""], ["website_url"], [" ", "website_url"]])
+def test_empty_selection_is_rejected(fields):
+    with pytest.raises(ValueError, match="No fields selected"):
+        parse_fields(fields)
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError, match="Unknown fields: bogus"):
+        parse_fields(["bogus", "faqs"])
@@ -0,0 +1,19 @@
+# shopify_insights_app/tests/test_fingerprints.py
+
+from services import fingerprints
+from services.fingerprints import PageFingerprints, page_fingerprint
+
+PAGE = '<html>\n  <body>\n    <script nonce="a1">track()</script>\n    <p>hello@acme.example</p>\n  </body>\n</html>'
+
+def test_formatting_and_nonces_dont_change_the_fingerprint():
+    reformatted = PAGE.replace("\n  ", "\r\n\t").replace('nonce="a1"', 'nonce="z9"')
+    assert page_fingerprint(reformatted) == page_fingerprint(PAGE)
+
+def test_content_changes_change_the_fingerprint():
+    assert page_fingerprint(PAGE.replace("hello@", "hi@")) != page_fingerprint(PAGE)
+
+def test_extractor_version_bump_invalidates_stored_fingerprints(monkeypatch):
+    known = {"faqs": {"url": "https://acme.example/pages/faqs", "fingerprint": page_fingerprint(PAGE)}}
+    monkeypatch.setattr(fingerprints, "EXTRACTOR_VERSION", fingerprints.EXTRACTOR_VERSION + 1)
+
+    assert not PageFingerprints(known, previous=object()).unchanged("faqs", "https://acme.example/pages/faqs", PAGE)
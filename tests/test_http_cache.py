@@ -0,0 +1,44 @@
+# shopify_insights_app/tests/test_http_cache.py
+
+import asyncio
+import os
+
+import httpx
+
+from services.http_cache import HTTPCache
+
+def validators(etag: str) -> httpx.Headers:
+    return httpx.Headers({"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+
+def test_not_modified_after_entry_was_evicted_mid_request(tmp_path):
+    async def scenario():
+        cache = HTTPCache(str(tmp_path), max_bytes=600)
+        await cache.store_body("https://acme.example/a", validators('"a"'), "a" * 300)
+        entry = await cache.lookup("https://acme.example/a")
+        assert entry is not None
+
+        # While the conditional request for a is in flight, another scrape's store evicts it
+        await cache.store_body("https://acme.example/b", validators('"b"'), "b" * 300)
+        assert await cache.lookup("https://acme.example/a") is None
+
+        request = httpx.Request("GET", "https://acme.example/a")
+        response = await cache.not_modified("https://acme.example/a", entry, request)
+        assert response.status_code == 200
+        assert response.text == "a" * 300
+        assert cache.stats()["entries"] == 1
+
+    asyncio.run(scenario())
+
+def test_concurrent_stores_of_one_url(tmp_path):
+    async def scenario():
+        cache = HTTPCache(str(tmp_path), max_bytes=1_000_000)
+        await asyncio.gather(*(
+            cache.store_body("https://acme.example/a", validators(f'"{i}"'), str(i) * 1000)
+            for i in range(10)
+        ))
+        entry = await cache.lookup("https://acme.example/a")
+        assert entry["body"] == entry["etag"].strip('"') * 1000
+        assert cache.stats()["entries"] == 1
+        assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+    asyncio.run(scenario())
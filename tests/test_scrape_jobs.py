@@ -0,0 +1,37 @@
+# shopify_insights_app/tests/test_scrape_jobs.py
+
+from datetime import datetime, timedelta
+
+from database import crud
+from database.models import ScrapeJobDB
+
+LEASE_TIMEOUT = 60
+
+def age_lease(db, job_id: str, seconds: int):
+    db_job = db.get(ScrapeJobDB, job_id)
+    db_job.started_at = db_job.heartbeat_at = datetime.utcnow() - timedelta(seconds=seconds)
+    db.commit()
+
+def test_renewed_lease_is_not_reclaimed(db):
+    job = crud.create_scrape_job(db, "https://acme.example/", "https://acme.example")
+    claimed = crud.claim_scrape_job(db, LEASE_TIMEOUT, max_attempts=3)
+    assert claimed.id == job.id
+
+    # The crawl has outlived the lease timeout, but its worker keeps renewing the lease
+    age_lease(db, job.id, LEASE_TIMEOUT * 2)
+    assert crud.renew_scrape_job_lease(db, job.id, claimed.attempts)
+    assert crud.claim_scrape_job(db, LEASE_TIMEOUT, max_attempts=3) is None
+
+def test_expired_lease_is_reclaimed_and_old_worker_is_fenced_off(db):
+    job = crud.create_scrape_job(db, "https://acme.example/", "https://acme.example")
+    first_attempt = crud.claim_scrape_job(db, LEASE_TIMEOUT, max_attempts=3).attempts
+
+    age_lease(db, job.id, LEASE_TIMEOUT * 2)
+    reclaimed = crud.claim_scrape_job(db, LEASE_TIMEOUT, max_attempts=3)
+    assert reclaimed.id == job.id and reclaimed.attempts == first_attempt + 1
+
+    # The first worker can neither renew nor finish the job any more
+    assert not crud.renew_scrape_job_lease(db, job.id, first_attempt)
+    crud.finish_scrape_job(db, job.id, crud.JOB_FAILED, 500, "stale worker", attempt=first_attempt)
+    db.expire_all()
+    assert db.get(ScrapeJobDB, job.id).status == crud.JOB_RUNNING
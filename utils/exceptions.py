@@ -0,0 +1,28 @@
+# shopify_insights_app/utils/exceptions.py
+
+from typing import Tuple
+import httpx
+from pydantic import ValidationError
+
+class WebsiteNotFoundError(Exception):
+    """Raised when a website cannot be reached or yields no meaningful data"""
+    pass
+
+class RateLimitExceededError(Exception):
+    """Raised when a website keeps throttling us (429 / Retry-After) beyond the retry budget"""
+    pass
+
+def error_status(e: Exception) -> Tuple[int, str]:
+    """Maps a scrape failure to the HTTP status code and message reported to clients."""
+    if isinstance(e, WebsiteNotFoundError):
+        return 404, str(e)
+    if isinstance(e, RateLimitExceededError):
+        return 429, str(e)
+    if isinstance(e, httpx.UnsupportedProtocol):
+        return 400, "Invalid URL format. Please ensure it includes http:// or https://"
+    if isinstance(e, httpx.ConnectError):
+        return 404, "Website not found or unreachable. Please check the URL."
+    if isinstance(e, ValidationError):
+        return 500, f"Data validation error: {e.errors()}"
+    print(f"An unexpected error occurred: {e}")
+    return 500, f"An internal server error occurred: {e}"
@@ -1,7 +1,11 @@
 # shopify_insights_app/utils/helpers.py
 
+import asyncio
+from typing import Awaitable, Optional, Sequence, TypeVar
 from urllib.parse import urlparse
 
+T = TypeVar("T")
+
 def normalize_url(url: str) -> str:
     """Ensures the URL has a scheme and ends with a slash."""
     if not url.startswith(('http://', 'https://')):
@@ -26,4 +30,22 @@ def is_valid_shopify_url(url: str) -> bool:
         return True
     # More advanced checks would require making a request and inspecting page source
     # For now, we rely on the /products.json check in the main scraping logic.
-    return True # Assume valid for now, will fail gracefully later if not shopify
\ No newline at end of file
+    return True # Assume valid for now, will fail gracefully later if not shopify
+
+async def first_success(candidates: Sequence[Awaitable[Optional[T]]]) -> Optional[T]:
+    """
+    Runs every candidate concurrently and returns the first truthy result in
+    list (priority) order, as soon as every higher-priority candidate has come
+    back empty. Candidates still running at that point are cancelled.
+    Exceptions are not swallowed: they propagate (after cancelling the rest).
+    """
+    tasks = [asyncio.ensure_future(candidate) for candidate in candidates]
+    try:
+        for task in tasks:
+            result = await task
+            if result:
+                return result
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
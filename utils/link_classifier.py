@@ -0,0 +1,59 @@
+# shopify_insights_app/utils/link_classifier.py
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+SOCIAL_PLATFORMS: Dict[str, List[str]] = {
+    'facebook': ['facebook.com', 'fb.me'],
+    'instagram': ['instagram.com'],
+    'twitter': ['twitter.com', 'x.com'],
+    'linkedin': ['linkedin.com'],
+    'youtube': ['youtube.com'], # Corrected YouTube domain
+    'pinterest': ['pinterest.com'],
+    'tiktok': ['tiktok.com']
+}
+
+IMPORTANT_LINK_KEYWORDS: Dict[str, List[str]] = {
+    "Order tracking": ["track order", "order status", "my orders"],
+    "Contact Us": ["contact", "support", "help center"],
+    "Blogs": ["blog", "news"],
+    "Shipping": ["shipping", "delivery"],
+    "Careers": ["careers", "jobs"],
+    "Terms of Service": ["terms of service", "terms & conditions"],
+    "Privacy Policy": ["privacy policy"],
+    "Refund Policy": ["refund policy", "return policy"]
+}
+
+class LinkClassifier:
+    """
+    Maps a link to the first category (in declaration order) whose keywords occur
+    in its text or URL. Keywords are normalized once, when the classifier is built,
+    so classifying a link lowercases its text and URL once and then only does
+    substring checks.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], match_text: bool = True,
+                 url_keyword: Callable[[str], str] = lambda keyword: keyword):
+        self.categories = list(categories)
+        self._rules: List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = [
+            (
+                category,
+                tuple(keyword.lower() for keyword in keywords) if match_text else (),
+                tuple(url_keyword(keyword).lower() for keyword in keywords),
+            )
+            for category, keywords in categories.items()
+        ]
+
+    def classify(self, text: Optional[str], url: Optional[str]) -> Optional[str]:
+        text_lower = text.lower() if text else ''
+        url_lower = url.lower() if url else ''
+        for category, text_keywords, url_keywords in self._rules:
+            for keyword in text_keywords:
+                if keyword in text_lower:
+                    return category
+            for keyword in url_keywords:
+                if keyword in url_lower:
+                    return category
+        return None
+
+SOCIAL_CLASSIFIER = LinkClassifier(SOCIAL_PLATFORMS, match_text=False)
+IMPORTANT_LINK_CLASSIFIER = LinkClassifier(IMPORTANT_LINK_KEYWORDS, url_keyword=lambda keyword: keyword.replace(' ', '-'))